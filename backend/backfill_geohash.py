@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+🔷 Preenche denuncias.geohash nas denúncias antigas
+
+Novas denúncias já recebem o geohash na criação. Este script calcula o
+das existentes, em blocos por id.
+
+Uso:
+    python backfill_geohash.py
+    python backfill_geohash.py --chunk-size 20000
+"""
+import time
+import argparse
+
+from sqlalchemy import update
+
+from database.connection import SessionLocal
+from database.models import Denuncia
+from services.geo import geohash_encode
+
+
+def backfill(chunk_size: int):
+    db = SessionLocal()
+    total = 0
+    started = time.time()
+    last_id = 0
+
+    try:
+        while True:
+            rows = db.query(Denuncia.id, Denuncia.latitude, Denuncia.longitude).filter(
+                Denuncia.id > last_id,
+                Denuncia.geohash.is_(None)
+            ).order_by(Denuncia.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            db.execute(update(Denuncia), [
+                {"id": row.id, "geohash": geohash_encode(row.latitude, row.longitude)}
+                for row in rows
+            ])
+            db.commit()
+
+            total += len(rows)
+            print(f"🔷 {total} denúncias atualizadas | {total / (time.time() - started):.0f}/s")
+    finally:
+        db.close()
+
+    print(f"✅ Geohash preenchido em {total} denúncias ({time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche o geohash das denúncias existentes")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Denúncias por bloco")
+    args = parser.parse_args()
+
+    backfill(args.chunk_size)
@@ -9,6 +9,7 @@ from .prompts.contexto import contexto_chatbot
 from typing import List, Optional
 from sqlalchemy.orm import Session
 import json
+from services.resilience import get_upstream, UpstreamUnavailableError
 
 
 # Carregar .env da raiz do projeto (pasta pai da pasta pai da pasta atual)
@@ -230,8 +231,9 @@ class GeminiChatbot:
             historico = self.get_historico()
             prompt_total = "\n".join(historico)
             
-            # Gerar resposta
-            response = self.model.generate_content(
+            # Gerar resposta (com disjuntor, limite de concorrência e prazo)
+            response = get_upstream("gemini").call_sync(
+                self.model.generate_content,
                 prompt_total,
                 generation_config={
                     "temperature": 0.7,
@@ -262,6 +264,15 @@ class GeminiChatbot:
                 'response_time': response_time
             }
             
+        except UpstreamUnavailableError as e:
+            logging.warning(f"Gemini indisponível: {e}")
+            return {
+                'resposta': "Estou recebendo muitas mensagens agora. Tente novamente em alguns instantes.",
+                'session_id': self.session_id,
+                'tokens_used': None,
+                'response_time': time.time() - start_time,
+                'error': str(e)
+            }
         except Exception as e:
             logging.error(f"Erro ao gerar resposta: {e}")
             return {
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+🔍 Verificação dos planos das consultas mais frequentes (EXPLAIN)
+
+Monta as mesmas consultas que a API executa e confere, com EXPLAIN, que
+cada uma é atendida pelo índice esperado. Com `enable_seqscan = off` o
+resultado não depende do tamanho das tabelas: se o índice some ou a
+consulta muda de forma que ele não serve mais, a verificação falha.
+
+Uso:
+    python check_query_plans.py      # sai com código 1 se algum plano regrediu
+"""
+import sys
+import json
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from database.connection import SessionLocal
+from database.models import Conversation, Message
+from services.denuncia_queries import filtered_denuncias, page_query, encode_cursor, DEFAULT_PAGE_SIZE, LIST_COLUMNS
+from services.denuncia_search import search_query
+from services.map_clusters import bbox_cluster_queries
+
+
+def compilar(query) -> str:
+    """SQL final da consulta ORM, com os valores embutidos"""
+    return str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def indices_usados(plan: dict) -> List[str]:
+    found = []
+    if "Index Name" in plan:
+        found.append(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found.extend(indices_usados(child))
+    return found
+
+
+def consultas(db):
+    """(nome, consulta ORM, índice esperado) espelhando main.py e chatbot/model.py"""
+    # Mesmas consultas das rotas: colunas de LIST_COLUMNS e página de page_denuncias,
+    # na primeira página e numa página seguinte (filtro do cursor)
+    cursor = encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), 1000)
+
+    def listagem(**filtros):
+        return filtered_denuncias(db, columns=LIST_COLUMNS, **filtros)
+
+    # Agregados do mapa como clusters_in_bbox os lê (litoral de Pernambuco, zoom 9);
+    # os deltas pendentes são poucas linhas e não têm índice próprio
+    bbox = (-9.0, -35.5, -7.5, -34.5)
+    clusters, _ = bbox_cluster_queries(db, *bbox, zoom=9)
+    clusters_categoria, _ = bbox_cluster_queries(db, *bbox, zoom=9, category="poluicao_aguas")
+
+    return [
+        (
+            "GET /denuncias/list",
+            page_query(listagem(), DEFAULT_PAGE_SIZE),
+            "ix_denuncias_created_id"
+        ),
+        (
+            "GET /denuncias/list?cursor=",
+            page_query(listagem(), DEFAULT_PAGE_SIZE, cursor),
+            "ix_denuncias_created_id"
+        ),
+        (
+            "GET /denuncias/list?status=",
+            page_query(listagem(status="validated"), DEFAULT_PAGE_SIZE),
+            "ix_denuncias_status_created_id"
+        ),
+        (
+            "GET /denuncias/list?category=",
+            page_query(listagem(category="poluicao_aguas"), DEFAULT_PAGE_SIZE),
+            "ix_denuncias_category_created_id"
+        ),
+        (
+            "GET /denuncias/list?category=&cursor=",
+            page_query(listagem(category="poluicao_aguas"), DEFAULT_PAGE_SIZE, cursor),
+            "ix_denuncias_category_created_id"
+        ),
+        (
+            "GET /denuncias/validated",
+            page_query(listagem(validated_only=True), DEFAULT_PAGE_SIZE),
+            "ix_denuncias_validated_created"
+        ),
+        (
+            "GET /denuncias/validated?cursor=",
+            page_query(listagem(validated_only=True), DEFAULT_PAGE_SIZE, cursor),
+            "ix_denuncias_validated_created"
+        ),
+        (
+            "Histórico do chat",
+            db.query(Message).filter(Message.conversation_id == 1).order_by(Message.created_at),
+            "ix_messages_conversation_created"
+        ),
+        (
+            "Última mensagem da conversa",
+            db.query(Message).filter(Message.conversation_id == 1).order_by(Message.created_at.desc()).limit(1),
+            "ix_messages_conversation_created"
+        ),
+        (
+            "GET /chat/conversations",
+            db.query(Conversation).order_by(Conversation.last_message_at.desc()),
+            "ix_conversations_last_message_at"
+        ),
+        (
+            "GET /denuncias/clusters",
+            clusters,
+            "denuncia_clusters_pkey"
+        ),
+        (
+            "GET /denuncias/clusters?category=",
+            clusters_categoria,
+            "denuncia_clusters_pkey"
+        ),
+        (
+            "GET /denuncias/search",
+            search_query(db, "óleo manguezal")[0],
+            "ix_denuncias_search_vector"
+        ),
+    ]
+
+
+def main():
+    db = SessionLocal()
+    falhas = 0
+    try:
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        for nome, query, esperado in consultas(db):
+            plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compilar(query)}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            usados = indices_usados(plan[0]["Plan"])
+
+            if esperado in usados:
+                print(f"✅ {nome}: {esperado}")
+            else:
+                falhas += 1
+                print(f"❌ {nome}: esperado {esperado}, plano usou {usados or 'seq scan'}")
+    finally:
+        db.rollback()
+        db.close()
+
+    if falhas:
+        print(f"❌ {falhas} consultas sem o índice esperado")
+        sys.exit(1)
+    print("✅ Todos os planos usam os índices esperados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+👂 Verificação do cache de respostas com o PostgreSQL de verdade
+
+Sobe o InvalidationListener com o engine da aplicação, espera o LISTEN
+ficar ativo, grava uma resposta no cache e manda um NOTIFY (como o
+commit de uma denúncia faz). A verificação passa se o listener conectou,
+o cache ligou e a entrada foi invalidada pelo aviso.
+
+Uso:
+    python check_response_cache.py      # sai com código 1 se algo falhou
+"""
+import sys
+import time
+
+from database.connection import SessionLocal, engine
+from services.response_cache import ResponseCache, InvalidationListener, notify_denuncias_changed, LISTS_SCOPE
+
+# Espera máxima pelo LISTEN e pela entrega do NOTIFY (segundos)
+TIMEOUT = 10.0
+
+
+def aguardar(condicao, timeout: float = TIMEOUT) -> bool:
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if condicao():
+            return True
+        time.sleep(0.05)
+    return condicao()
+
+
+def main():
+    cache = ResponseCache(max_entries=16, ttl_seconds=60)
+    listener = InvalidationListener(cache, engine, reconnect_delay=1.0)
+    listener.start()
+    falhas = 0
+
+    try:
+        if aguardar(lambda: listener.connected and cache.enabled):
+            print("✅ Listener conectado e cache ligado")
+        else:
+            print(f"❌ Listener não conectou em {TIMEOUT}s: {cache.stats()}")
+            sys.exit(1)
+
+        chave = ("check", 1)
+        cache.set(chave, LISTS_SCOPE, (b"[]", {}), cache.snapshot())
+        if cache.get(chave, LISTS_SCOPE) is None:
+            falhas += 1
+            print("❌ Resposta gravada não voltou do cache")
+
+        db = SessionLocal()
+        try:
+            notify_denuncias_changed(db, [0])
+            db.commit()
+        finally:
+            db.close()
+
+        if aguardar(lambda: cache.get(chave, LISTS_SCOPE) is None):
+            print("✅ NOTIFY invalidou a resposta em cache")
+        else:
+            falhas += 1
+            print(f"❌ Resposta continuou no cache depois do NOTIFY: {cache.stats()}")
+    finally:
+        listener.stop()
+
+    if falhas:
+        print(f"❌ {falhas} verificações do cache de respostas falharam")
+        sys.exit(1)
+    print("✅ Cache de respostas funcionando")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+-- Colunas e índices adicionados antes do controle de versões (antigo migrate_db.py).
+-- Tudo com IF NOT EXISTS: bancos que já rodaram o script antigo passam direto.
+
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS is_ai_validated BOOLEAN DEFAULT FALSE;
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS is_valid BOOLEAN DEFAULT NULL;
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS validation_score INTEGER DEFAULT 0;
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS validation_details JSONB DEFAULT NULL;
+
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS image_hash VARCHAR(64) DEFAULT NULL;
+CREATE INDEX IF NOT EXISTS ix_denuncias_image_hash ON denuncias (image_hash);
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS image_variants JSONB DEFAULT NULL;
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS vision_results JSONB DEFAULT NULL;
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS image_phash VARCHAR(16) DEFAULT NULL;
+CREATE INDEX IF NOT EXISTS ix_denuncias_image_phash ON denuncias (image_phash);
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS incident_id INTEGER REFERENCES incidents(id) DEFAULT NULL;
+CREATE INDEX IF NOT EXISTS ix_denuncias_incident_id ON denuncias (incident_id);
+CREATE INDEX IF NOT EXISTS ix_denuncias_created_id ON denuncias (created_at, id);
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS geohash VARCHAR(12) DEFAULT NULL;
+CREATE INDEX IF NOT EXISTS ix_denuncias_geohash ON denuncias (geohash);
+CREATE INDEX IF NOT EXISTS ix_denuncias_category_created_id ON denuncias (category, created_at, id);
+
+ALTER TABLE validation_jobs ADD COLUMN IF NOT EXISTS timings_ms JSONB DEFAULT NULL;
+ALTER TABLE validation_jobs ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE validation_jobs ADD COLUMN IF NOT EXISTS virtual_deadline TIMESTAMPTZ;
+UPDATE validation_jobs SET virtual_deadline = created_at WHERE virtual_deadline IS NULL;
+ALTER TABLE validation_jobs ALTER COLUMN virtual_deadline SET DEFAULT now(), ALTER COLUMN virtual_deadline SET NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_validation_jobs_status_deadline ON validation_jobs (status, virtual_deadline);
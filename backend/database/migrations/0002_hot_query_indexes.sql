@@ -0,0 +1,20 @@
+-- migrate: no-transaction
+-- Índices das consultas mais frequentes, criados sem bloquear escritas (CONCURRENTLY).
+-- Conferidos por check_query_plans.py.
+
+-- /denuncias/validated: só as linhas aprovadas, já na ordem da paginação
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_denuncias_validated_created
+    ON denuncias (created_at, id)
+    WHERE is_ai_validated = true AND is_valid = true AND validation_score >= 65;
+
+-- /denuncias/list?status=... (paginação por created_at, id)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_denuncias_status_created_id
+    ON denuncias (status, created_at, id);
+
+-- Histórico do chat: mensagens de uma conversa em ordem
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_conversation_created
+    ON messages (conversation_id, created_at);
+
+-- /chat/conversations: conversas mais recentes primeiro
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversations_last_message_at
+    ON conversations (last_message_at);
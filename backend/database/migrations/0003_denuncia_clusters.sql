@@ -0,0 +1,76 @@
+-- Agregados do mapa por célula geohash (precisões 2 a 7), por categoria e status.
+-- Mantidos por trigger em denuncias: inserção, validação concluída, re-score,
+-- backfill de geohash e remoção. Lidos por GET /denuncias/clusters.
+
+CREATE TABLE IF NOT EXISTS denuncia_clusters (
+    resolution INTEGER NOT NULL,
+    cell VARCHAR(12) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    sum_lat DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sum_lng DOUBLE PRECISION NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (resolution, cell, category, status)
+);
+
+-- Soma `delta` (+1/-1) na célula do ponto em cada precisão, sempre na mesma ordem
+CREATE OR REPLACE FUNCTION denuncia_clusters_apply(
+    p_geohash TEXT, p_lat DOUBLE PRECISION, p_lng DOUBLE PRECISION,
+    p_category TEXT, p_status TEXT, p_delta INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    IF p_geohash IS NULL OR p_geohash = '' THEN
+        RETURN;
+    END IF;
+    FOR p IN 2..7 LOOP
+        INSERT INTO denuncia_clusters AS c (resolution, cell, category, status, count, sum_lat, sum_lng, updated_at)
+        VALUES (p, left(p_geohash, p), coalesce(p_category, ''), coalesce(p_status, ''),
+                p_delta, p_lat * p_delta, p_lng * p_delta, now())
+        ON CONFLICT (resolution, cell, category, status) DO UPDATE SET
+            count = c.count + EXCLUDED.count,
+            sum_lat = c.sum_lat + EXCLUDED.sum_lat,
+            sum_lng = c.sum_lng + EXCLUDED.sum_lng,
+            updated_at = now();
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION denuncia_clusters_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM denuncia_clusters_apply(OLD.geohash, OLD.latitude, OLD.longitude, OLD.category, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM denuncia_clusters_apply(NEW.geohash, NEW.latitude, NEW.longitude, NEW.category, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_denuncia_clusters_insert_delete ON denuncias;
+CREATE TRIGGER trg_denuncia_clusters_insert_delete
+    AFTER INSERT OR DELETE ON denuncias
+    FOR EACH ROW EXECUTE FUNCTION denuncia_clusters_trigger();
+
+-- Só quando muda algo que entra no agregado (validação, re-score, backfill de geohash)
+DROP TRIGGER IF EXISTS trg_denuncia_clusters_update ON denuncias;
+CREATE TRIGGER trg_denuncia_clusters_update
+    AFTER UPDATE OF status, category, geohash, latitude, longitude ON denuncias
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.category IS DISTINCT FROM NEW.category
+          OR OLD.geohash IS DISTINCT FROM NEW.geohash
+          OR OLD.latitude IS DISTINCT FROM NEW.latitude
+          OR OLD.longitude IS DISTINCT FROM NEW.longitude)
+    EXECUTE FUNCTION denuncia_clusters_trigger();
+
+-- Carga inicial. Os triggers acima já bloqueiam escritas em denuncias até o
+-- commit, então nada escapa entre a carga e o início da manutenção.
+TRUNCATE denuncia_clusters;
+INSERT INTO denuncia_clusters (resolution, cell, category, status, count, sum_lat, sum_lng, updated_at)
+SELECT p, left(d.geohash, p), coalesce(d.category, ''), coalesce(d.status, ''),
+       count(*), sum(d.latitude), sum(d.longitude), now()
+FROM denuncias d CROSS JOIN generate_series(2, 7) AS p
+WHERE d.geohash IS NOT NULL AND d.geohash <> ''
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,23 @@
+-- Busca textual em português (GET /denuncias/search): configuração
+-- pt_unaccent (stemmer português + sem acentos: "óleo" = "oleo") e coluna
+-- gerada com descrição (peso A) e endereço (peso B).
+-- A coluna não está no modelo ORM: só existe a partir desta migração.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = pg_catalog.portuguese);
+        ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END;
+$$;
+
+-- Reescreve a tabela uma vez (bloqueia escritas em denuncias durante a migração)
+ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('pt_unaccent'::regconfig, coalesce(description, '')), 'A') ||
+        setweight(to_tsvector('pt_unaccent'::regconfig, coalesce(address, '')), 'B')
+    ) STORED;
@@ -0,0 +1,6 @@
+-- migrate: no-transaction
+-- Índice GIN da busca textual, criado sem bloquear escritas.
+-- Conferido por check_query_plans.py.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_denuncias_search_vector
+    ON denuncias USING gin (search_vector);
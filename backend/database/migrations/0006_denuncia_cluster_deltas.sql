@@ -0,0 +1,69 @@
+-- Agregados do mapa sem disputa por linhas quentes.
+-- O trigger da 0003 fazia upsert em 6 células (12 numa troca de status) por
+-- escrita; as células grossas (precisões 2 a 4) cobrem regiões inteiras, então
+-- toda denúncia nova e todo veredito esperavam pelas mesmas linhas, e re-score e
+-- workers trocando validated <-> rejected em sentidos opostos podiam travar
+-- (deadlock). Agora o trigger só acrescenta deltas (+1/-1) numa tabela sem
+-- conflito; denuncia_clusters_fold() os soma em denuncia_clusters em lote, numa
+-- ordem fixa de chave. GET /denuncias/clusters soma os deltas ainda não dobrados.
+
+CREATE TABLE IF NOT EXISTS denuncia_cluster_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    geohash VARCHAR(12) NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    delta INTEGER NOT NULL,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE OR REPLACE FUNCTION denuncia_clusters_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND coalesce(OLD.geohash, '') <> '' THEN
+        INSERT INTO denuncia_cluster_deltas (geohash, category, status, delta, latitude, longitude)
+        VALUES (OLD.geohash, coalesce(OLD.category, ''), coalesce(OLD.status, ''), -1, OLD.latitude, OLD.longitude);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND coalesce(NEW.geohash, '') <> '' THEN
+        INSERT INTO denuncia_cluster_deltas (geohash, category, status, delta, latitude, longitude)
+        VALUES (NEW.geohash, coalesce(NEW.category, ''), coalesce(NEW.status, ''), 1, NEW.latitude, NEW.longitude);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP FUNCTION IF EXISTS denuncia_clusters_apply(TEXT, DOUBLE PRECISION, DOUBLE PRECISION, TEXT, TEXT, INTEGER);
+
+-- Soma até `p_limit` deltas (os mais antigos) em denuncia_clusters e os apaga,
+-- na mesma transação. Um fold por vez (advisory lock); os upserts seguem a
+-- ordem da chave primária, então nunca travam uns aos outros.
+CREATE OR REPLACE FUNCTION denuncia_clusters_fold(p_limit INTEGER) RETURNS INTEGER AS $$
+DECLARE
+    folded INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('denuncia_clusters_fold')) THEN
+        RETURN 0;
+    END IF;
+
+    WITH moved AS (
+        DELETE FROM denuncia_cluster_deltas
+        WHERE id IN (SELECT id FROM denuncia_cluster_deltas ORDER BY id LIMIT p_limit)
+        RETURNING geohash, category, status, delta, latitude, longitude
+    ), applied AS (
+        INSERT INTO denuncia_clusters AS c (resolution, cell, category, status, count, sum_lat, sum_lng, updated_at)
+        SELECT p, left(m.geohash, p), m.category, m.status,
+               sum(m.delta), sum(m.latitude * m.delta), sum(m.longitude * m.delta), now()
+        FROM moved m CROSS JOIN generate_series(2, 7) AS p
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (resolution, cell, category, status) DO UPDATE SET
+            count = c.count + EXCLUDED.count,
+            sum_lat = c.sum_lat + EXCLUDED.sum_lat,
+            sum_lng = c.sum_lng + EXCLUDED.sum_lng,
+            updated_at = now()
+    )
+    SELECT count(*) INTO folded FROM moved;
+
+    RETURN folded;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,150 @@
+# database/migrator.py
+import re
+import hashlib
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+# Arquivos com esta marcação rodam fora de transação, um comando por vez
+# (exigido por CREATE INDEX CONCURRENTLY)
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# Chave do advisory lock: dois deploys simultâneos não aplicam migrações em paralelo
+MIGRATION_LOCK_KEY = 7_482_019_021
+
+_CONCURRENT_INDEX_RE = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)", re.IGNORECASE
+)
+
+
+class Migration:
+    def __init__(self, path: Path):
+        self.path = path
+        self.version, _, name = path.stem.partition("_")
+        self.name = name or path.stem
+        self.sql = path.read_text(encoding="utf-8")
+        self.checksum = hashlib.sha256(self.sql.encode()).hexdigest()
+        self.transactional = NO_TRANSACTION_MARKER not in self.sql.splitlines()[0] if self.sql else True
+
+    def statements(self) -> List[str]:
+        """
+        Comandos separados por ';' no fim da linha (comentários -- ignorados)
+
+        Corpos entre $$ (funções PL/pgSQL) não são divididos.
+        """
+        statements, current = [], []
+        in_body = False
+        for line in self.sql.splitlines():
+            stripped = line.strip()
+            if not stripped or (stripped.startswith("--") and not in_body):
+                continue
+            current.append(line)
+            if line.count("$$") % 2:
+                in_body = not in_body
+            if stripped.endswith(";") and not in_body:
+                statements.append("\n".join(current))
+                current = []
+        if current:
+            statements.append("\n".join(current))
+        return statements
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    return [Migration(path) for path in sorted(directory.glob("[0-9][0-9][0-9][0-9]_*.sql"))]
+
+
+def _ensure_table(conn):
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version VARCHAR(20) PRIMARY KEY,
+            name VARCHAR(200) NOT NULL,
+            checksum VARCHAR(64) NOT NULL,
+            applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """))
+
+
+def applied_migrations(conn) -> Dict[str, str]:
+    """versão -> checksum das migrações já aplicadas"""
+    _ensure_table(conn)
+    rows = conn.execute(text("SELECT version, checksum FROM schema_migrations"))
+    return {row.version: row.checksum for row in rows}
+
+
+def _drop_invalid_index(conn, statement: str):
+    """
+    Um CREATE INDEX CONCURRENTLY interrompido deixa um índice inválido que o
+    IF NOT EXISTS pularia para sempre: removê-lo antes de tentar de novo
+    """
+    match = _CONCURRENT_INDEX_RE.search(statement)
+    if not match:
+        return
+    invalid = conn.execute(text("""
+        SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": match.group(1)}).first()
+    if invalid:
+        print(f"🧹 Removendo índice inválido {match.group(1)}")
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{match.group(1)}"'))
+
+
+def _record(conn, migration: Migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, checksum) VALUES (:version, :name, :checksum)"),
+        {"version": migration.version, "name": migration.name, "checksum": migration.checksum}
+    )
+
+
+def apply_migration(engine: Engine, migration: Migration):
+    print(f"🔧 Aplicando {migration.version}_{migration.name}")
+
+    if migration.transactional:
+        # Tudo ou nada: comandos e registro na mesma transação
+        with engine.begin() as conn:
+            for statement in migration.statements():
+                conn.execute(text(statement))
+            _record(conn, migration)
+        return
+
+    # Fora de transação: cada comando é confirmado na hora, por isso devem ser idempotentes
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for statement in migration.statements():
+            _drop_invalid_index(conn, statement)
+            conn.execute(text(statement))
+        _record(conn, migration)
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    with engine.begin() as conn:
+        applied = applied_migrations(conn)
+
+    pending = []
+    for migration in discover_migrations():
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum:
+            print(f"⚠️ Migração {migration.version}_{migration.name} foi alterada depois de aplicada")
+    return pending
+
+
+def migrate(engine: Engine) -> int:
+    """
+    🗄️ Aplica as migrações pendentes, em ordem. Retorna quantas foram aplicadas
+
+    As tabelas continuam sendo criadas por Base.metadata.create_all (que não
+    altera tabelas existentes); as migrações cuidam de colunas novas e índices.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            pending = pending_migrations(engine)
+            for migration in pending:
+                apply_migration(engine, migration)
+            return len(pending)
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
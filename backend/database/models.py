@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Float, DateTime, Boolean, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .connection import Base
 
+# Score mínimo de /denuncias/validated, fixado no predicado do índice parcial
+# ix_denuncias_validated_created criado pela migração 0002. Mudar este valor
+# exige uma migração nova que recrie o índice com o mesmo número.
+VALIDATED_MIN_SCORE = 65
+
 class User(Base):
     __tablename__ = "users"
     
@@ -31,6 +36,9 @@ class Denuncia(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     address = Column(String(500), nullable=True)
+    geohash = Column(String(12), nullable=True, index=True)  # Busca por área (services/spatial_queries.py)
+    # search_vector (tsvector gerado de description + address) vem da migração 0004,
+    # fora do modelo: depende da configuração de busca pt_unaccent
     
     # Categoria e status
     category = Column(String(50), default="poluicao_marinha")
@@ -39,22 +47,107 @@ class Denuncia(Base):
     # Arquivos
     image_filename = Column(String(255), nullable=True)
     image_path = Column(String(500), nullable=True)
+    image_hash = Column(String(64), nullable=True, index=True)  # SHA-256 do conteúdo
+    image_variants = Column(JSON, default=None)  # {"vision", "medium", "thumbnail"}
+    image_phash = Column(String(16), nullable=True, index=True)  # dHash de 64 bits (hex)
     
     # 🤖 Campos de validação AI
     is_ai_validated = Column(Boolean, default=False)
     is_valid = Column(Boolean, default=None)
     validation_score = Column(Integer, default=0)
     validation_details = Column(JSON, default=None)
+    vision_results = Column(JSON, default=None)  # Saída completa do Vision (para re-score)
     
     # Metadados
     processed = Column(Boolean, default=False)
     
+    # Ocorrência que agrupa denúncias da mesma categoria no mesmo lugar e período
+    incident_id = Column(Integer, ForeignKey("incidents.id"), nullable=True, index=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relacionamento com usuário
     user = relationship("User", back_populates="denuncias")
+    incident = relationship("Incident", back_populates="denuncias")
+    
+    __table_args__ = (
+        # Paginação por chave (created_at, id), com e sem filtro
+        Index("ix_denuncias_created_id", "created_at", "id"),
+        Index("ix_denuncias_category_created_id", "category", "created_at", "id"),
+        Index("ix_denuncias_status_created_id", "status", "created_at", "id"),
+        # /denuncias/validated: índice parcial só com as aprovadas
+        # (mesmo predicado da migração 0002)
+        Index(
+            "ix_denuncias_validated_created", "created_at", "id",
+            postgresql_where=text(
+                f"is_ai_validated = true AND is_valid = true AND validation_score >= {VALIDATED_MIN_SCORE}"
+            )
+        ),
+    )
+
+class Incident(Base):
+    __tablename__ = "incidents"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    category = Column(String(50), nullable=False)
+    
+    # Posição da primeira denúncia e célula da grade (busca por vizinhança)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    address = Column(String(500), nullable=True)
+    grid_cell = Column(String(32), nullable=False)
+    
+    report_count = Column(Integer, nullable=False, default=1)
+    first_reported_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_reported_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    
+    # Veredito da primeira validação AI concluída, reaproveitado pelas demais denúncias
+    is_valid = Column(Boolean, default=None)
+    validation_score = Column(Integer, nullable=True)
+    verdict_denuncia_id = Column(Integer, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    # Relacionamento
+    denuncias = relationship("Denuncia", back_populates="incident")
+    
+    __table_args__ = (
+        # Busca de ocorrência aberta: categoria + células vizinhas + janela de tempo
+        Index("ix_incidents_category_cell_last", "category", "grid_cell", "last_reported_at"),
+    )
+
+class DenunciaCluster(Base):
+    __tablename__ = "denuncia_clusters"
+    
+    # Célula geohash (prefixo de denuncias.geohash com `resolution` caracteres)
+    resolution = Column(Integer, primary_key=True)
+    cell = Column(String(12), primary_key=True)
+    category = Column(String(50), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    
+    # Mantidos pelo trigger da migração 0003 (nunca gravados pela aplicação)
+    count = Column(Integer, nullable=False, default=0)
+    sum_lat = Column(Float, nullable=False, default=0)
+    sum_lng = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class DenunciaClusterDelta(Base):
+    __tablename__ = "denuncia_cluster_deltas"
+    
+    # +1/-1 gravados pelo trigger da migração 0006 e somados em denuncia_clusters
+    # por denuncia_clusters_fold() (ver services/map_clusters.py)
+    id = Column(BigInteger, primary_key=True)
+    geohash = Column(String(12), nullable=False)
+    category = Column(String(50), nullable=False)
+    status = Column(String(50), nullable=False)
+    delta = Column(Integer, nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 class Conversation(Base):
     __tablename__ = "conversations"
@@ -68,7 +161,7 @@ class Conversation(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    last_message_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_message_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     # Relacionamentos
     user = relationship("User", back_populates="conversations")
@@ -93,4 +186,61 @@ class Message(Base):
     
     # Relacionamento
     conversation = relationship("Conversation", back_populates="messages")
-    
\ No newline at end of file
+    
+    __table_args__ = (
+        # Histórico de uma conversa em ordem
+        Index("ix_messages_conversation_created", "conversation_id", "created_at"),
+    )
+    
+class ValidationJob(Base):
+    __tablename__ = "validation_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    denuncia_id = Column(Integer, ForeignKey("denuncias.id"), nullable=False, index=True)
+    
+    # Estado do job: queued, running, done, failed
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+    
+    # Prioridade (maior = antes) e prazo virtual = criação - prioridade × envelhecimento
+    priority = Column(Integer, nullable=False, default=0)
+    virtual_deadline = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    # Agendamento e visibilidade
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_by = Column(String(100), nullable=True)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # Tempo de cada etapa da validação, incluindo o commit final (ms)
+    timings_ms = Column(JSON, nullable=True)
+    
+    # Relacionamento
+    denuncia = relationship("Denuncia")
+    
+    __table_args__ = (
+        # Ordem de retirada da fila
+        Index("ix_validation_jobs_status_deadline", "status", "virtual_deadline"),
+    )
+
+class VisionResult(Base):
+    __tablename__ = "vision_results"
+    
+    # SHA-256 da imagem + features pedidas
+    cache_key = Column(String(200), primary_key=True)
+    image_hash = Column(String(64), nullable=False, index=True)
+    
+    # Saída completa do Vision (labels, text, safe_search, landmarks)
+    results = Column(JSON, nullable=False)
+    
+    # Uso e expiração
+    hit_count = Column(Integer, default=0)
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
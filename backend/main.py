@@ -1,19 +1,40 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from pydantic import BaseModel
 from typing import Optional, List
 from sqlalchemy.orm import Session
 import os
 import json
-import shutil
-import uuid
 from datetime import datetime
 from pathlib import Path
 
 # Imports da nossa estrutura
 from database.connection import get_db, engine
 from database.models import Base, User, Denuncia, Conversation, Message
-from services.ai_validation_service import SmartDenunciaValidator
+from database.migrator import pending_migrations
+from services.upload_service import UploadTooLargeError
+from services.image_store import ContentAddressedImageStore
+from services.validation_queue import (
+    check_backpressure, enqueue_validation, queue_stats, timing_samples, QueueFullError, MAX_TIMING_SAMPLES
+)
+from services.timing import aggregate_timings
+from services.validation_priority import compute_priority
+from services.spatial_queries import denuncias_in_bbox, denuncias_nearby, MAX_SPATIAL_RESULTS, MAX_RADIUS_M
+from services.geo import geohash_encode
+from services.map_clusters import clusters_in_bbox, parse_bbox
+from services.denuncia_queries import filtered_denuncias, page_denuncias, clamp_limit, InvalidCursorError, LIST_COLUMNS
+from services.json_response import dumps, iter_json_array
+from services.denuncia_search import search_denuncias, DEFAULT_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE
+from services.incidents import (
+    attach_to_incident, apply_incident_verdict, record_incident_verdict, incident_has_verdict,
+    real_validation_filter, list_incidents
+)
+from services.vision_cache import db_cache_stats
+from services.response_cache import ResponseCache, InvalidationListener, notify_denuncias_changed, LISTS_SCOPE
+from services.resilience import upstreams_snapshot
 from chatbot.model import GeminiChatbot
 
 # Criar tabelas no banco
@@ -21,9 +42,13 @@ print("🏗️ Criando tabelas no PostgreSQL...")
 Base.metadata.create_all(bind=engine)
 print("✅ Tabelas criadas com sucesso!")
 
-# Inicializar validador AI
-ai_validator = SmartDenunciaValidator()
-print("🤖 Validador AI inicializado!")
+# Colunas novas e índices vêm das migrações versionadas (python migrate_db.py)
+try:
+    pendentes = pending_migrations(engine)
+    if pendentes:
+        print(f"⚠️ {len(pendentes)} migrações pendentes: rode 'python migrate_db.py'")
+except Exception as e:
+    print(f"⚠️ Não foi possível verificar migrações: {e}")
 
 # Configuração do FastAPI
 app = FastAPI(
@@ -39,11 +64,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configuração de uploads
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+image_store = ContentAddressedImageStore(UPLOAD_DIR)
+
+# 🗂️ Cache das leituras de denúncias, invalidado por NOTIFY (criação e validação)
+response_cache = ResponseCache()
+cache_listener = InvalidationListener(response_cache, engine)
+
+@app.on_event("startup")
+def iniciar_cache_respostas():
+    if response_cache.configured:
+        cache_listener.start()
+
+@app.on_event("shutdown")
+def parar_cache_respostas():
+    cache_listener.stop()
 
 # 🌊 Pydantic models
 class DenunciaCreate(BaseModel):
@@ -71,6 +111,7 @@ class DenunciaResponse(BaseModel):
     status: str
     image_filename: Optional[str]
     image_path: Optional[str]
+    image_variants: Optional[dict] = None
     processed: bool
     created_at: datetime
     updated_at: Optional[datetime]
@@ -78,6 +119,21 @@ class DenunciaResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class IncidentResponse(BaseModel):
+    id: int
+    category: str
+    latitude: float
+    longitude: float
+    address: Optional[str]
+    report_count: int
+    first_reported_at: datetime
+    last_reported_at: datetime
+    is_valid: Optional[bool] = None
+    validation_score: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
 class DenunciaList(BaseModel):
     id: int
     description: str
@@ -88,6 +144,7 @@ class DenunciaList(BaseModel):
     status: str
     image_filename: Optional[str]
     image_path: Optional[str]
+    image_variants: Optional[dict] = None
     created_at: datetime
     is_ai_validated: Optional[bool] = False
     is_valid: Optional[bool] = None
@@ -96,6 +153,17 @@ class DenunciaList(BaseModel):
     class Config:
         from_attributes = True
 
+class DenunciaNearby(DenunciaList):
+    distance_m: float
+
+class DenunciaSearchResult(DenunciaList):
+    rank: float
+    snippet: Optional[str] = None
+
+# Validação em bloco das listagens (linhas de LIST_COLUMNS)
+DENUNCIA_LIST_ADAPTER = TypeAdapter(List[DenunciaList])
+DENUNCIA_SEARCH_ADAPTER = TypeAdapter(List[DenunciaSearchResult])
+
 # Chat models
 class ChatMessageRequest(BaseModel):
     conversation_id: Optional[int] = None
@@ -110,76 +178,43 @@ class ChatMessageResponse(BaseModel):
     conversation: Optional[dict] = None
 
 # Função helper para salvar imagem
-def save_image(image: UploadFile) -> tuple:
-    """Salva a imagem e retorna (caminho_completo, nome_arquivo)"""
+async def save_image(image: UploadFile) -> dict:
+    """Salva a imagem no store por conteúdo e retorna caminho, nome, sha256 e tamanho"""
     try:
-        image_filename = f"{uuid.uuid4().hex[:8]}.{image.filename.split('.')[-1]}"
-        image_path = UPLOAD_DIR / image_filename
-        
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        return str(image_path), image_filename
+        return await image_store.save(image)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao salvar imagem: {str(e)}")
 
-def process_ai_validation_background(denuncia_id: int, image_path: str, 
-                                         category: str, description: str, 
-                                         location: dict):
-    """🤖 Processa validação AI em background - VERSÃO SÍNCRONA"""
-    try:
-        print(f"🔄 Iniciando validação AI em background para denúncia {denuncia_id}")
-        
-        # Executar validação IA de forma síncrona
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            validation_result = loop.run_until_complete(
-                ai_validator.validate_denuncia_complete(
-                    image_path, category, description, location
-                )
-            )
-        finally:
-            loop.close()
-        
-        # Atualizar no banco
-        from database.connection import SessionLocal
-        db = SessionLocal()
-        
-        try:
-            denuncia = db.query(Denuncia).filter(Denuncia.id == denuncia_id).first()
-            if denuncia:
-                denuncia.is_ai_validated = True
-                denuncia.is_valid = validation_result["is_valid"]
-                denuncia.validation_score = validation_result["confidence_score"]
-                denuncia.validation_details = validation_result["details"]
-                denuncia.status = "validated" if validation_result["is_valid"] else "rejected"
-                
-                db.commit()
-                
-                print(f"✅ Validação AI concluída para denúncia {denuncia_id}:")
-                print(f"   🎯 Válida: {validation_result['is_valid']}")
-                print(f"   📊 Score: {validation_result['confidence_score']}/100")
-                print(f"   📋 Status: {denuncia.status}")
-            
-        finally:
-            db.close()
-            
-    except Exception as e:
-        print(f"❌ Erro na validação AI background: {e}")
-        
-        # Em caso de erro, marcar como "needs_manual_review"
-        from database.connection import SessionLocal
-        db = SessionLocal()
-        try:
-            denuncia = db.query(Denuncia).filter(Denuncia.id == denuncia_id).first()
-            if denuncia:
-                denuncia.status = "needs_manual_review"
-                denuncia.is_ai_validated = False
-                db.commit()
-        finally:
-            db.close()
+def _resposta_em_cache(key: tuple, scope, montar) -> Response:
+    """
+    Resposta JSON do cache ou montada agora por `montar()` -> (corpo, headers)
+
+    O corpo pode ser bytes ou um iterador de pedaços (iter_json_array): nesse
+    caso a resposta sai em streaming e só os bytes vão para o cache no fim.
+    A versão do cache é lida antes da consulta ao banco: se uma denúncia
+    mudar no meio do caminho, o resultado não é guardado.
+    """
+    cached = response_cache.get(key, scope)
+    if cached is not None:
+        body, headers = cached
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    versao = response_cache.snapshot()
+    body, headers = montar()
+    if isinstance(body, bytes):
+        response_cache.set(key, scope, (body, headers), versao)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def transmitir():
+        pedacos = []
+        for pedaco in body:
+            pedacos.append(pedaco)
+            yield pedaco
+        response_cache.set(key, scope, (b"".join(pedacos), headers), versao)
+
+    return StreamingResponse(transmitir(), media_type="application/json", headers=headers)
 
 @app.get("/")
 async def root():
@@ -196,7 +231,12 @@ async def root():
         "endpoints": {
             "denuncias": "/denuncias",
             "listar_denuncias": "/denuncias/list",
+            "clusters_mapa": "/denuncias/clusters",
+            "buscar_denuncias": "/denuncias/search",
+            "ocorrencias": "/incidents/list",
             "status_validacao": "/denuncias/{id}/status",
+            "fila_validacao": "/validation/queue",
+            "tempos_validacao": "/metrics/validation-timings",
             "chat": "/chat",
             "mares": "/mares",
             "docs": "/docs"
@@ -243,9 +283,86 @@ async def obter_dados_mares():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao obter dados de marés: {str(e)}")
 
+def _gravar_denuncia(db: Session, description: str, latitude: float, longitude: float,
+                     address: Optional[str], category: str, image_path: Optional[str],
+                     image_filename: Optional[str], image_hash: Optional[str]):
+    """
+    Grava a denúncia, liga à ocorrência e enfileira a validação numa transação
+
+    Síncrona (várias idas ao banco): o endpoint assíncrono a executa no
+    threadpool para não bloquear o event loop.
+
+    Returns:
+        (denúncia, id da duplicada ou None, id da ocorrência, veredito da ocorrência reaproveitado?)
+        Só ids: depois do commit, ler atributos de outros objetos iria ao banco de novo.
+    """
+    # Criar nova denúncia no banco (status inicial: pending_validation)
+    nova_denuncia = Denuncia(
+        description=description,
+        latitude=latitude,
+        longitude=longitude,
+        address=address,
+        geohash=geohash_encode(latitude, longitude),
+        category=category,
+        status="pending_validation",  # 🔄 Status inicial para AI async
+        image_filename=image_filename,
+        image_path=image_path,
+        image_hash=image_hash,
+        processed=False,
+        is_ai_validated=False,  # 🤖 Ainda não validado
+        is_valid=None,          # 🔍 Ainda não analisado
+        validation_score=0      # 📊 Score inicial
+    )
+
+    # ♻️ Imagem idêntica já validada? Reaproveitar o resultado sem chamar o Vision
+    # (só resultados reais: um resultado de contingência não é reaproveitado)
+    duplicada = None
+    if image_hash:
+        duplicada = db.query(Denuncia).filter(
+            Denuncia.image_hash == image_hash,
+            real_validation_filter()
+        ).order_by(Denuncia.id.desc()).first()
+
+    if duplicada:
+        nova_denuncia.is_ai_validated = True
+        nova_denuncia.is_valid = duplicada.is_valid
+        nova_denuncia.validation_score = duplicada.validation_score
+        nova_denuncia.image_variants = duplicada.image_variants
+        nova_denuncia.vision_results = duplicada.vision_results
+        nova_denuncia.validation_details = {
+            **(duplicada.validation_details or {}),
+            "duplicate_of": duplicada.id
+        }
+        # Status manual da original (ex.: resolved) não vale para a nova denúncia
+        nova_denuncia.status = "validated" if duplicada.is_valid else "rejected"
+
+    # 🧩 Mesma ocorrência (categoria, raio e janela de tempo) já relatada?
+    incident = attach_to_incident(db, nova_denuncia)
+    # Veredito de contingência não conta: com imagem, a denúncia vai para a fila
+    veredito_ocorrencia = not duplicada and incident_has_verdict(db, incident)
+    if veredito_ocorrencia:
+        apply_incident_verdict(nova_denuncia, incident)
+
+    db.add(nova_denuncia)
+    db.flush()
+
+    if duplicada:
+        record_incident_verdict(db, nova_denuncia)
+    duplicada_id = duplicada.id if duplicada else None
+    incident_id = incident.id
+
+    # 🚀 ENFILEIRAR VALIDAÇÃO AI (mesma transação da denúncia)
+    if image_path and not duplicada and not veredito_ocorrencia:
+        enqueue_validation(db, nova_denuncia.id, compute_priority(nova_denuncia))
+
+    notify_denuncias_changed(db, [nova_denuncia.id])
+    db.commit()
+    response_cache.invalidate([nova_denuncia.id])  # Neste processo, sem esperar o NOTIFY
+    db.refresh(nova_denuncia)
+    return nova_denuncia, duplicada_id, incident_id, veredito_ocorrencia
+
 @app.post("/denuncias", response_model=DenunciaCreateResponse)
 async def criar_denuncia(
-    background_tasks: BackgroundTasks,
     image: Optional[UploadFile] = File(None),
     description: str = Form(...),
     latitude: float = Form(...),
@@ -257,56 +374,54 @@ async def criar_denuncia(
     """
     🌊 Criar nova denúncia com validação AI assíncrona
     
-    A denúncia é salva imediatamente e a validação AI é processada em background.
+    A denúncia é salva imediatamente e a validação AI entra na fila persistente,
+    processada pelos workers (python worker.py).
     Use o endpoint /denuncias/{id}/status para acompanhar o progresso.
     """
     try:
+        # 🚦 Backpressure: recusar antes de gravar se a fila está cheia
+        if image:
+            await run_in_threadpool(check_backpressure, db)
+        
         # Salvar imagem se fornecida
         image_path = None
         image_filename = None
+        image_hash = None
         
         if image:
-            image_path, image_filename = save_image(image)
-        
-        # Criar nova denúncia no banco (status inicial: pending_validation)
-        nova_denuncia = Denuncia(
-            description=description,
-            latitude=latitude,
-            longitude=longitude,
-            address=address,
-            category=category,
-            status="pending_validation",  # 🔄 Status inicial para AI async
-            image_filename=image_filename,
-            image_path=image_path,
-            processed=False,
-            is_ai_validated=False,  # 🤖 Ainda não validado
-            is_valid=None,          # 🔍 Ainda não analisado
-            validation_score=0      # 📊 Score inicial
+            saved_image = await save_image(image)
+            image_path = saved_image["path"]
+            image_filename = saved_image["filename"]
+            image_hash = saved_image["sha256"]
+            print(f"📥 Imagem recebida: {saved_image['size']} bytes (sha256: {image_hash[:12]}...)")
+        
+        nova_denuncia, duplicada_id, incident_id, veredito_ocorrencia = await run_in_threadpool(
+            _gravar_denuncia, db, description, latitude, longitude, address, category,
+            image_path, image_filename, image_hash
         )
         
-        db.add(nova_denuncia)
-        db.commit()
-        db.refresh(nova_denuncia)
+        print(f"✅ Denúncia {nova_denuncia.id} salva no PostgreSQL (ocorrência {incident_id})")
         
-        print(f"✅ Denúncia {nova_denuncia.id} salva no PostgreSQL")
+        if duplicada_id:
+            print(f"♻️ Imagem idêntica à denúncia {duplicada_id} - validação reaproveitada")
+            return {
+                "success": True,
+                "message": "Denúncia recebida! Imagem já validada anteriormente.",
+                "denuncia_id": nova_denuncia.id,
+                "saved_at": nova_denuncia.created_at.isoformat()
+            }
         
-        # 🚀 EXECUTAR VALIDAÇÃO AI EM BACKGROUND (se tem imagem)
-        if image_path:
-            location_dict = {
-                "latitude": latitude,
-                "longitude": longitude,
-                "address": address or f"Lat: {latitude}, Long: {longitude}"
+        if veredito_ocorrencia:
+            print(f"🧩 Ocorrência {incident_id} já validada - veredito reaproveitado")
+            return {
+                "success": True,
+                "message": "Denúncia recebida! Esta ocorrência já foi relatada e validada.",
+                "denuncia_id": nova_denuncia.id,
+                "saved_at": nova_denuncia.created_at.isoformat()
             }
-            
-            background_tasks.add_task(
-                process_ai_validation_background,
-                nova_denuncia.id,
-                image_path,
-                category,
-                description,
-                location_dict
-            )
-            print(f"🤖 Validação AI agendada para background (ID: {nova_denuncia.id})")
+        
+        if image_path:
+            print(f"🤖 Validação AI enfileirada (ID: {nova_denuncia.id})")
         
         return {
             "success": True,
@@ -315,8 +430,14 @@ async def criar_denuncia(
             "saved_at": nova_denuncia.created_at.isoformat()
         }
         
+    except QueueFullError as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except HTTPException:
+        await run_in_threadpool(db.rollback)
+        raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
         print(f"❌ Erro ao criar denúncia: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
@@ -357,47 +478,244 @@ async def get_validation_status(denuncia_id: int, db: Session = Depends(get_db))
         raise HTTPException(status_code=500, detail=f"Erro ao consultar status: {str(e)}")
 
 @app.get("/denuncias/list", response_model=List[DenunciaList])
-async def listar_denuncias(db: Session = Depends(get_db)):
-    """Listar todas as denúncias com informações básicas"""
+def listar_denuncias(
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Listar denúncias com informações básicas (mais recentes primeiro)
+    
+    Paginado: se houver mais resultados, o header X-Next-Cursor traz o
+    cursor da próxima página (passe em ?cursor=).
+    """
+    limit = clamp_limit(limit)
+
+    def montar():
+        query = filtered_denuncias(db, category, status, created_from, created_to, columns=LIST_COLUMNS)
+        rows, next_cursor = page_denuncias(query, limit, cursor)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return iter_json_array(rows, DENUNCIA_LIST_ADAPTER), headers
+
     try:
-        denuncias = db.query(Denuncia).order_by(Denuncia.created_at.desc()).all()
-        return [DenunciaList.from_orm(denuncia) for denuncia in denuncias]
+        key = ("list", limit, cursor, category, status, created_from, created_to)
+        return _resposta_em_cache(key, LISTS_SCOPE, montar)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar denúncias: {str(e)}")
 
 @app.get("/denuncias/validated", response_model=List[DenunciaList])
-async def listar_denuncias_validadas(db: Session = Depends(get_db)):
-    """🤖 Listar denúncias validadas pela AI (score >= 65)"""
+def listar_denuncias_validadas(
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """🤖 Listar denúncias validadas pela AI (score >= 65), paginado como /denuncias/list"""
+    limit = clamp_limit(limit)
+
+    def montar():
+        query = filtered_denuncias(
+            db, category, None, created_from, created_to, validated_only=True, columns=LIST_COLUMNS
+        )
+        rows, next_cursor = page_denuncias(query, limit, cursor)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return iter_json_array(rows, DENUNCIA_LIST_ADAPTER), headers
+
     try:
-        denuncias = db.query(Denuncia).filter(
-            Denuncia.is_ai_validated == True,
-            Denuncia.is_valid == True,
-            Denuncia.validation_score >= 65
-        ).order_by(Denuncia.created_at.desc()).all()
-        
-        return [DenunciaList.from_orm(denuncia) for denuncia in denuncias]
+        key = ("validated", limit, cursor, category, created_from, created_to)
+        return _resposta_em_cache(key, LISTS_SCOPE, montar)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar denúncias validadas: {str(e)}")
 
+@app.get("/denuncias/bbox", response_model=List[DenunciaList])
+def listar_denuncias_area(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    limit: int = 500,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """🗺️ Denúncias dentro da área visível do mapa (mais recentes primeiro)"""
+    if min_lat > max_lat or min_lng > max_lng:
+        raise HTTPException(status_code=400, detail="Área inválida: min_lat/min_lng devem ser menores que max_lat/max_lng")
+    try:
+        denuncias = denuncias_in_bbox(
+            db, min_lat, min_lng, max_lat, max_lng, max(1, min(limit, MAX_SPATIAL_RESULTS)), category
+        )
+        return [DenunciaList.from_orm(denuncia) for denuncia in denuncias]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar denúncias na área: {str(e)}")
+
+@app.get("/denuncias/nearby", response_model=List[DenunciaNearby])
+def listar_denuncias_proximas(
+    lat: float,
+    lng: float,
+    radius_m: float = 2000,
+    limit: int = 50,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """📍 Denúncias próximas de um ponto, da mais próxima para a mais distante"""
+    if not 0 < radius_m <= MAX_RADIUS_M:
+        raise HTTPException(status_code=400, detail=f"radius_m deve estar entre 0 e {MAX_RADIUS_M}")
+    try:
+        resultados = denuncias_nearby(db, lat, lng, radius_m, max(1, min(limit, MAX_SPATIAL_RESULTS)), category)
+        return [
+            DenunciaNearby(**DenunciaList.from_orm(denuncia).dict(), distance_m=distance)
+            for denuncia, distance in resultados
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar denúncias próximas: {str(e)}")
+
+@app.get("/denuncias/search", response_model=List[DenunciaSearchResult])
+def buscar_denuncias(
+    q: str,
+    limit: int = DEFAULT_SEARCH_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    🔎 Busca textual em descrição e endereço (português, sem diferença de acentos)
+
+    Aceita "frase exata", OR e -excluir. Resultados por relevância, com trecho
+    destacado em `snippet` (<mark>termo</mark>); paginado pelo header X-Next-Cursor.
+    """
+    q = q.strip()
+    if len(q) < 2:
+        raise HTTPException(status_code=400, detail="Informe ao menos 2 caracteres em q")
+    limit = max(1, min(limit, MAX_SEARCH_PAGE_SIZE))
+
+    def montar():
+        rows, next_cursor = search_denuncias(db, q, limit, cursor, category)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return iter_json_array(rows, DENUNCIA_SEARCH_ADAPTER), headers
+
+    try:
+        return _resposta_em_cache(("search", q, limit, cursor, category), LISTS_SCOPE, montar)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
+
+@app.get("/denuncias/clusters")
+def listar_clusters_mapa(
+    bbox: str,
+    zoom: float,
+    category: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    🗺️ Clusters para o mapa: centróide, total e divisão por categoria/status
+
+    bbox = "min_lat,min_lng,max_lat,max_lng". O tamanho das células acompanha
+    o zoom; os números vêm de agregados pré-calculados (denuncia_clusters)
+    mais os deltas que o worker ainda não somou.
+    """
+    try:
+        min_lat, min_lng, max_lat, max_lng = parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not 0 <= zoom <= 22:
+        raise HTTPException(status_code=400, detail="zoom deve estar entre 0 e 22")
+
+    def montar():
+        return dumps(clusters_in_bbox(db, min_lat, min_lng, max_lat, max_lng, zoom, category)), {}
+
+    try:
+        return _resposta_em_cache(("clusters", bbox, zoom, category), LISTS_SCOPE, montar)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular clusters: {str(e)}")
+
 @app.get("/denuncias/{denuncia_id}", response_model=DenunciaList)
-async def obter_denuncia(denuncia_id: int, db: Session = Depends(get_db)):
+def obter_denuncia(denuncia_id: int, db: Session = Depends(get_db)):
     """Obter denúncia específica por ID"""
-    denuncia = db.query(Denuncia).filter(Denuncia.id == denuncia_id).first()
-    
-    if not denuncia:
-        raise HTTPException(status_code=404, detail="Denúncia não encontrada")
+    def montar():
+        denuncia = db.query(*LIST_COLUMNS).filter(Denuncia.id == denuncia_id).first()
+        
+        if not denuncia:
+            raise HTTPException(status_code=404, detail="Denúncia não encontrada")
+        
+        return dumps(DenunciaList.model_validate(denuncia).model_dump()), {}
     
-    return DenunciaList.from_orm(denuncia)
+    return _resposta_em_cache(("denuncia", denuncia_id), denuncia_id, montar)
+
+@app.get("/validation/queue")
+def status_fila_validacao(db: Session = Depends(get_db)):
+    """📊 Profundidade da fila de validação AI por status"""
+    try:
+        return queue_stats(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar fila: {str(e)}")
+
+@app.get("/incidents/list", response_model=List[IncidentResponse])
+def listar_ocorrencias(
+    category: Optional[str] = None,
+    only_open: bool = False,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """🧩 Ocorrências (denúncias agrupadas por categoria, lugar e período), mais recentes primeiro"""
+    try:
+        incidents = list_incidents(db, category, only_open, max(1, min(limit, 1000)))
+        return [IncidentResponse.from_orm(incident) for incident in incidents]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar ocorrências: {str(e)}")
+
+@app.get("/metrics/validation-timings")
+def metricas_tempo_validacao(limit: int = 1000, db: Session = Depends(get_db)):
+    """⏱️ Histogramas do tempo de cada etapa da validação AI nos últimos jobs concluídos"""
+    try:
+        samples = timing_samples(db, max(1, min(limit, MAX_TIMING_SAMPLES)))
+        return {
+            "jobs": len(samples),
+            "stages": aggregate_timings(samples)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar métricas: {str(e)}")
+
+@app.get("/vision/cache")
+def status_cache_vision(db: Session = Depends(get_db)):
+    """🗃️ Estatísticas do cache persistente de resultados do Google Vision"""
+    try:
+        return db_cache_stats(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar cache: {str(e)}")
+
+@app.get("/metrics/response-cache")
+async def status_cache_respostas():
+    """🗂️ Acertos, invalidações e tamanho do cache de leituras de denúncias deste processo"""
+    return {**response_cache.stats(), "listener_connected": cache_listener.connected}
+
+@app.get("/resilience")
+async def status_resiliencia():
+    """🛡️ Estado dos disjuntores e limites de concorrência dos upstreams deste processo"""
+    return upstreams_snapshot()
 
 # === ENDPOINTS DE CHAT ===
 
 @app.post("/chat/message", response_model=ChatMessageResponse)
-async def enviar_mensagem_chat(
+def enviar_mensagem_chat(
     request: ChatMessageRequest,
     db: Session = Depends(get_db)
 ):
     """
     💬 Enviar mensagem para o chatbot Nereu
+    
+    Endpoint síncrono: o FastAPI o executa no threadpool, então a chamada
+    ao Gemini não bloqueia o event loop.
     """
     try:
         # Instanciar o chatbot com sessão do banco
@@ -1,42 +1,45 @@
 #!/usr/bin/env python3
 """
-🤖 Migração para adicionar campos AI na tabela denuncias
+🗄️ Migrações versionadas do banco
+
+Cria as tabelas que faltam (Base.metadata.create_all) e aplica, em ordem,
+os arquivos pendentes de database/migrations/ (NNNN_descricao.sql).
+O que já foi aplicado fica registrado na tabela schema_migrations.
+
+Uso:
+    python migrate_db.py            # aplica as pendentes
+    python migrate_db.py --status   # só lista aplicadas/pendentes
+    python migrate_db.py --check    # sai com erro se houver pendentes (CI/deploy)
 """
-from sqlalchemy import text
+import sys
+import argparse
+
 from database.connection import engine
+from database.models import Base
+from database.migrator import migrate, pending_migrations, discover_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrações do banco do Guarda Azul")
+    parser.add_argument("--status", action="store_true", help="Lista migrações aplicadas e pendentes")
+    parser.add_argument("--check", action="store_true", help="Falha se houver migrações pendentes")
+    args = parser.parse_args()
 
-def migrate_denuncias_table():
-    """Adiciona campos de validação AI na tabela denuncias"""
-    
     print("🗄️ Conectando ao PostgreSQL...")
-    
-    # Comandos SQL para adicionar colunas
-    migration_sql = [
-        "ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS is_ai_validated BOOLEAN DEFAULT FALSE;",
-        "ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS is_valid BOOLEAN DEFAULT NULL;", 
-        "ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS validation_score INTEGER DEFAULT 0;",
-        "ALTER TABLE denuncias ADD COLUMN IF NOT EXISTS validation_details JSONB DEFAULT NULL;"
-    ]
-    
-    with engine.connect() as conn:
-        for sql in migration_sql:
-            print(f"🔧 Executando: {sql}")
-            conn.execute(text(sql))
-        
-        conn.commit()
-        print("✅ Migração concluída com sucesso!")
-        
-        # Verificar se as colunas foram criadas
-        result = conn.execute(text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = 'denuncias' 
-            AND column_name IN ('is_ai_validated', 'is_valid', 'validation_score', 'validation_details')
-            ORDER BY column_name;
-        """))
-        
-        columns = [row[0] for row in result]
-        print(f"🤖 Colunas AI criadas: {columns}")
+
+    if args.status or args.check:
+        pending = {migration.version for migration in pending_migrations(engine)}
+        for migration in discover_migrations():
+            estado = "⏳ pendente" if migration.version in pending else "✅ aplicada"
+            print(f"   {migration.version}_{migration.name}: {estado}")
+        if args.check and pending:
+            sys.exit(1)
+        return
+
+    Base.metadata.create_all(bind=engine)
+    applied = migrate(engine)
+    print(f"✅ Migração concluída com sucesso! ({applied} aplicadas)")
+
 
 if __name__ == "__main__":
-    migrate_denuncias_table() 
\ No newline at end of file
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+📐 Re-score offline das denúncias já validadas
+
+Reaplica as regras atuais de pontuação sobre a saída do Vision guardada
+em `denuncias.vision_results`, sem nenhuma chamada ao Vision, e grava
+is_valid / validation_score / status e os componentes do score e a versão
+das regras em validation_details com UPDATEs em lote.
+
+Uso:
+    python rescore.py                  # aplica
+    python rescore.py --dry-run        # só mostra quantas mudariam
+    python rescore.py --chunk-size 20000
+"""
+import time
+import argparse
+
+from sqlalchemy import or_, update
+
+from database.connection import SessionLocal
+from database.models import Denuncia
+from services.ai_validation_service import SmartDenunciaValidator
+from services.bulk_rescoring import BulkRescorer
+from services.response_cache import notify_denuncias_changed
+from services.incidents import refresh_incident_verdicts
+
+
+# Só status decididos pela AI: status manuais (ex.: resolved, em revisão) ficam como estão
+STATUS_REAVALIADOS = ("validated", "rejected")
+
+
+def status_reavaliavel():
+    # OR em vez de IN: o UPDATE em lote (executemany) não aceita parâmetros expandidos
+    return or_(*[Denuncia.status == status for status in STATUS_REAVALIADOS])
+
+
+def carregar_bloco(db, after_id: int, chunk_size: int):
+    """Próximo bloco de denúncias com saída do Vision e status decidido pela AI (paginação por id)"""
+    return db.query(
+        Denuncia.id,
+        Denuncia.category,
+        Denuncia.description,
+        Denuncia.latitude,
+        Denuncia.longitude,
+        Denuncia.address,
+        Denuncia.vision_results,
+        Denuncia.is_valid,
+        Denuncia.validation_score,
+        Denuncia.validation_details
+    ).filter(
+        Denuncia.id > after_id,
+        Denuncia.is_ai_validated == True,
+        Denuncia.vision_results.isnot(None),
+        status_reavaliavel()
+    ).order_by(Denuncia.id).limit(chunk_size).all()
+
+
+# Componentes de BulkRescorer.score_chunk copiados para validation_details
+COMPONENTES = (
+    "category_match", "description_match", "location_relevance",
+    "spam_detection", "environmental_bonus"
+)
+
+
+def novos_detalhes(details, vision_results, result, i: int, rules_version) -> dict:
+    """
+    validation_details refeito com as regras atuais
+
+    Todos os campos que dependem das regras (componentes, labels ambientais
+    e irrelevantes, contexto externo, versão) são recalculados; do detalhe
+    antigo só ficam os que não dependem delas (backend, método, tempos,
+    duplicata de origem...).
+    """
+    return {
+        **(details or {}),
+        **{name: int(result[name][i]) for name in COMPONENTES},
+        "detected_labels": (vision_results.get("labels") or [])[:10],
+        "environmental_labels": result["environmental_labels"][i],
+        "irrelevant_labels": result["irrelevant_labels"][i],
+        "has_outdoor_context": bool(result["has_outdoor_context"][i]),
+        "rules_version": rules_version
+    }
+
+
+def rescore(chunk_size: int, dry_run: bool):
+    validator = SmartDenunciaValidator(with_backends=False)
+    rescorer = BulkRescorer(validator)
+    print(f"📜 Re-score com as regras versão {rescorer.rules.version}")
+
+    db = SessionLocal()
+    total = changed = 0
+    started = time.time()
+    last_id = 0
+
+    try:
+        while True:
+            rows = carregar_bloco(db, last_id, chunk_size)
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            result = rescorer.score_chunk([row._asdict() for row in rows])
+
+            # Só grava as denúncias cujo resultado ou detalhamento mudou
+            updates = []
+            for i, row in enumerate(rows):
+                score, is_valid = int(result["confidence_score"][i]), bool(result["is_valid"][i])
+                details = novos_detalhes(row.validation_details, row.vision_results, result, i, rescorer.rules.version)
+                if score != row.validation_score or is_valid != row.is_valid or details != row.validation_details:
+                    updates.append({
+                        "id": row.id,
+                        "is_valid": is_valid,
+                        "validation_score": score,
+                        "validation_details": details,
+                        "status": "validated" if is_valid else "rejected"
+                    })
+
+            if updates and not dry_run:
+                # O filtro de status se repete no UPDATE: um status manual gravado
+                # depois da leitura do bloco não é sobrescrito
+                db.execute(
+                    update(Denuncia).where(status_reavaliavel()).execution_options(synchronize_session=None),
+                    updates
+                )
+                # Veredito das ocorrências (e de quem o copiou) na mesma transação
+                refresh_incident_verdicts(db, [item["id"] for item in updates])
+                notify_denuncias_changed(db)  # Lote grande demais para o payload do NOTIFY: invalida tudo
+                db.commit()
+
+            total += len(rows)
+            changed += len(updates)
+            print(f"📐 {total} denúncias processadas | {changed} alteradas | {total / (time.time() - started):.0f}/s")
+
+    finally:
+        db.close()
+
+    modo = " (dry-run, nada foi gravado)" if dry_run else ""
+    print(f"✅ Re-score concluído em {time.time() - started:.1f}s: {changed}/{total} alteradas{modo}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score offline das validações armazenadas")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Denúncias por bloco")
+    parser.add_argument("--dry-run", action="store_true", help="Calcula sem gravar")
+    args = parser.parse_args()
+
+    rescore(args.chunk_size, args.dry_run)
@@ -5,141 +5,205 @@ from dotenv import load_dotenv
 # Carregar variáveis de ambiente
 load_dotenv()
 
-from google.cloud import vision
 import json
+import asyncio
+import hashlib
 import logging
+from pathlib import Path
 from typing import Dict, List, Tuple
 
+from services.vision_backends import create_backend, create_backend_safe
+from services.vision_batcher import VisionMicroBatcher
+from services.vision_cache import VisionResultCache
+from services.scoring_rules import RulesManager, CompiledRules
+from services.resilience import get_upstream, UpstreamUnavailableError
+from services.timing import SpanRecorder
+from services.geo import is_coastal_area
+from services.text_analysis import match_description
+
+# Backend principal e de contingência: "google", "local" (ONNX em CPU) ou "none"
+VISION_BACKEND = os.getenv("VISION_BACKEND", "google")  # "none" só vale para o fallback
+VISION_FALLBACK_BACKEND = os.getenv("VISION_FALLBACK_BACKEND", "none")
+
+# Agrupar imagens de várias denúncias na mesma chamada ao Vision
+VISION_BATCHING = os.getenv("VISION_BATCHING", "true").lower() == "true"
+
 class SmartDenunciaValidator:
-    def __init__(self):
-        self.client = vision.ImageAnnotatorClient()
-        
-        # Mapeamento categoria -> objetos esperados na imagem
-        self.category_expected_objects = {
-            'poluicao_aguas': [
-                'water', 'ocean', 'sea', 'river', 'pollution', 'oil', 'waste',
-                'sewage', 'chemical', 'barrel', 'pipe', 'industrial', 'spill'
-            ],
-            'desmatamento': [
-                'tree', 'forest', 'mangrove', 'vegetation', 'deforestation',
-                'cut', 'chainsaw', 'logging', 'cleared land', 'stump', 'wood'
-            ],
-            'erosao_costeira': [
-                'beach', 'coast', 'erosion', 'cliff', 'sand', 'shore',
-                'wave', 'damage', 'collapse', 'coastal', 'dune'
-            ],
-            'poluicao_solo': [
-                'trash', 'garbage', 'waste', 'plastic', 'bottle', 'bag',
-                'dump', 'landfill', 'litter', 'debris', 'contamination'
-            ],
-            'fauna_marinha': [
-                'turtle', 'fish', 'marine', 'animal', 'dead', 'net', 'plastic',
-                'sea turtle', 'dolphin', 'whale', 'fishing', 'bird', 'crab'
-            ],
-            'flora_marinha': [
-                'coral', 'algae', 'seaweed', 'marine plant', 'underwater vegetation',
-                'reef', 'aquatic plant', 'kelp', 'sea grass', 'plankton'
-            ],
-            'poluicao_sonora': [
-                'noise', 'sound', 'loud', 'boat', 'ship', 'motor', 'engine',
-                'construction', 'machinery', 'industrial noise'
-            ],
-            'construcoes_irregulares': [
-                'construction', 'building', 'house', 'structure', 'concrete',
-                'unauthorized', 'illegal building', 'pier', 'dock', 'foundation'
-            ],
-            'exploracao_recursos': [
-                'mining', 'extraction', 'sand', 'mineral', 'excavation', 'quarry',
-                'dredging', 'drilling', 'heavy machinery', 'truck', 'equipment'
-            ],
-            'turismo_predatorio': [
-                'tourist', 'crowd', 'vehicle on beach', 'camping', 'fires', 'tent',
-                'atv', 'motorcycle', 'car on sand', 'trampling', 'disturbance'
-            ],
-            'outros': [
-                'environmental damage', 'pollution', 'waste', 'problem', 'issue',
-                'concern', 'violation', 'illegal activity', 'harm'
-            ]
-        }
+    def __init__(self, with_backends: bool = True):
+        """
+        with_backends=False cria só as regras de pontuação, sem backends de visão
+        (usado no re-score offline, que não chama o Vision)
+        """
+        self.vision_backend = None
+        self.vision_batcher = None
+        self.fallback_backend = None
+        self.vision_cache = None
+        
+        if with_backends:
+            # Backend de visão compartilhado (ex.: um canal gRPC por processo)
+            self.vision_backend = create_backend(VISION_BACKEND)
+            if self.vision_backend is None:
+                raise ValueError(
+                    "VISION_BACKEND=none não é suportado: o worker precisa de um backend de visão "
+                    "(\"google\" ou \"local\"); \"none\" só vale para VISION_FALLBACK_BACKEND"
+                )
+            self.vision_batcher = VisionMicroBatcher(self.vision_backend) if VISION_BATCHING else None
+            
+            # Backend usado quando o principal falha (None = sem contingência)
+            self.fallback_backend = create_backend_safe(VISION_FALLBACK_BACKEND)
+            if self.fallback_backend and self.fallback_backend.name == self.vision_backend.name:
+                self.fallback_backend = None
+            
+            # Cache dos resultados por hash da imagem (memória + PostgreSQL)
+            self.vision_cache = VisionResultCache()
+        
+        # 📜 Palavras-chave, pesos e features vêm do arquivo de regras (recarregado a quente)
+        self.rules_manager = RulesManager()
+    
+    @property
+    def rules(self) -> CompiledRules:
+        """Versão atual das regras"""
+        return self.rules_manager.current()
+    
+    def match_labels(self, labels: List[str], rules: CompiledRules = None) -> List[frozenset]:
+        """Palavras-chave contidas em cada label (uma passada por label)"""
+        return (rules or self.rules).match_labels(labels)
     
     async def validate_denuncia_complete(self, 
                                        image_path: str, 
                                        category: str, 
                                        description: str, 
-                                       location: Dict) -> Dict:
+                                       location: Dict,
+                                       spans: SpanRecorder = None,
+                                       vision_results: Dict = None) -> Dict:
         """
         Validação completa cruzando TODOS os dados
+        
+        O tempo de cada etapa vai para `details["timings_ms"]`; quem chama
+        pode passar o próprio `spans` para medir também as etapas de fora
+        (normalização da imagem, gravação no banco).
+        
+        `vision_results` já conhecidos (ex.: de uma quase-duplicata) pulam a
+        chamada ao Vision; a pontuação usa os dados desta denúncia.
+        
+        A versão das regras é fixada no início: um recarregamento no meio
+        da validação só vale para as próximas.
         """
+        spans = spans or SpanRecorder()
+        rules = self.rules
         try:
             # 1. Análise da imagem com Google Vision
-            vision_results = await self.analyze_image_with_vision(image_path)
+            if vision_results is None:
+                vision_results = await self.analyze_image_with_vision(image_path, category, spans, rules)
+            
+            with spans.span("label_matching"):
+                label_matches = rules.match_labels(vision_results["labels"])
             
             # 2. Validação cruzada: categoria vs imagem
-            category_match_score = self.validate_category_vs_image(category, vision_results)
+            with spans.span("validate_category_vs_image"):
+                category_match_score = self.validate_category_vs_image(category, vision_results, label_matches, rules)
             
             # 3. Validação: descrição vs imagem  
-            description_match_score = self.validate_description_vs_image(description, vision_results)
+            with spans.span("validate_description_vs_image"):
+                description_match_score = self.validate_description_vs_image(description, vision_results)
             
             # 4. Validação geográfica
-            location_score = self.validate_location_context(location, category)
+            with spans.span("validate_location_context"):
+                location_score = self.validate_location_context(location, category, rules)
             
             # 5. Detecção de spam/fake
-            spam_score = self.detect_spam_patterns(description, vision_results)
+            with spans.span("detect_spam_patterns"):
+                spam_score = self.detect_spam_patterns(description, vision_results, rules)
             
             # 6. Cálculo final
-            final_result = self.calculate_final_validation(
-                category_match_score,
-                description_match_score, 
-                location_score,
-                spam_score,
-                vision_results
-            )
+            with spans.span("final_calculation"):
+                final_result = self.calculate_final_validation(
+                    category_match_score,
+                    description_match_score, 
+                    location_score,
+                    spam_score,
+                    vision_results,
+                    label_matches,
+                    rules
+                )
+            
+            # Saída completa do Vision, persistida para re-score offline
+            final_result["vision_results"] = vision_results
+            final_result["details"]["timings_ms"] = spans.as_dict()
             
             return final_result
             
+        except UpstreamUnavailableError:
+            # Upstream degradado: o job volta para a fila com backoff em vez de aprovar no escuro
+            raise
         except Exception as e:
             logging.error(f"AI Validation error: {e}")
-            return self.fallback_validation()
+            result = self.fallback_validation()
+            result["details"]["timings_ms"] = spans.as_dict()
+            return result
     
-    async def analyze_image_with_vision(self, image_path: str) -> Dict:
-        """Análise completa da imagem com Google Vision"""
-        
-        with open(image_path, 'rb') as image_file:
-            content = image_file.read()
-        
-        image = vision.Image(content=content)
-        
-        # Múltiplas análises em paralelo
-        requests = [
-            # Detectar objetos/labels
-            {"image": image, "features": [{"type_": vision.Feature.Type.LABEL_DETECTION, "max_results": 20}]},
-            # Detectar texto (útil para placas, documentos)
-            {"image": image, "features": [{"type_": vision.Feature.Type.TEXT_DETECTION}]},
-            # Safe search (detectar conteúdo inadequado)
-            {"image": image, "features": [{"type_": vision.Feature.Type.SAFE_SEARCH_DETECTION}]},
-            # Detectar landmarks (praias, locais conhecidos)
-            {"image": image, "features": [{"type_": vision.Feature.Type.LANDMARK_DETECTION}]}
-        ]
+    async def analyze_image_with_vision(self, image_path: str, category: str = None,
+                                        spans: SpanRecorder = None, rules: CompiledRules = None) -> Dict:
+        """Análise completa da imagem pelo backend de visão (uma única requisição)"""
+        spans = spans or SpanRecorder()
+        rules = rules or self.rules
         
-        responses = self.client.batch_annotate_images(requests=requests)
+        # Leitura e hash fora do event loop
+        with spans.span("image_read"):
+            content, image_hash = await asyncio.to_thread(self._read_image, image_path)
         
-        return {
-            "labels": [label.description.lower() for label in responses.responses[0].label_annotations],
-            "text": responses.responses[1].full_text_annotation.text if responses.responses[1].full_text_annotation else "",
-            "safe_search": responses.responses[2].safe_search_annotation,
-            "landmarks": [landmark.description.lower() for landmark in responses.responses[3].landmark_annotations]
-        }
+        features = rules.vision_features(category)
+        
+        with spans.span("vision_call"):
+            return await self._analyze_with_fallback(content, image_hash, features)
+    
+    async def _analyze_with_fallback(self, content: bytes, image_hash: str, features: List[str]) -> Dict:
+        try:
+            return await self._analyze_with_backend(self.vision_backend, content, image_hash, features)
+        except Exception as e:
+            if not self.fallback_backend:
+                raise
+            logging.warning(f"Backend '{self.vision_backend.name}' falhou ({e}), usando '{self.fallback_backend.name}'")
+            return await self._analyze_with_backend(self.fallback_backend, content, image_hash, features)
+    
+    async def _analyze_with_backend(self, backend, content: bytes, image_hash: str, features: List[str]) -> Dict:
+        # ♻️ Resultado já conhecido para esta imagem neste backend?
+        cache_key = self.vision_cache.make_key(image_hash, features, backend.name)
+        cached = await self.vision_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # 🛡️ Disjuntor, limite adaptativo, prazo e hedging por upstream
+        batched = backend is self.vision_backend and self.vision_batcher is not None
+        if batched:
+            factory = lambda: self.vision_batcher.annotate(content, features)
+        else:
+            factory = lambda: backend.annotate(content, features)
+        # Sem hedging no lote: a tentativa extra reenviaria a imagem em outro lote
+        results = await get_upstream(backend.upstream).call(factory, hedge=not batched)
+        
+        results = {**results, "backend": backend.name}
+        await self.vision_cache.set(cache_key, image_hash, results)
+        return results
     
-    def validate_category_vs_image(self, category: str, vision_results: Dict) -> int:
+    @staticmethod
+    def _read_image(image_path: str) -> Tuple[bytes, str]:
+        content = Path(image_path).read_bytes()
+        return content, hashlib.sha256(content).hexdigest()
+    
+    def validate_category_vs_image(self, category: str, vision_results: Dict,
+                                   label_matches: List[frozenset] = None,
+                                   rules: CompiledRules = None) -> int:
         """Verifica se a categoria bate com o que foi detectado na imagem"""
+        rules = rules or self.rules
         
-        expected_objects = self.category_expected_objects.get(category, [])
-        detected_labels = vision_results["labels"]
+        expected_objects = rules.category_expected_objects.get(category, [])
+        if label_matches is None:
+            label_matches = rules.match_labels(vision_results["labels"])
         
-        matches = 0
-        for expected in expected_objects:
-            if any(expected in label for label in detected_labels):
-                matches += 1
+        # Palavras-chave encontradas em qualquer label
+        found = frozenset().union(*label_matches)
+        matches = sum(1 for expected in expected_objects if expected in found)
         
         # Score baseado na % de match
         if not expected_objects:
@@ -149,29 +213,27 @@ class SmartDenunciaValidator:
         return min(40, int(match_percentage * 0.4))  # Max 40 pontos
     
     def validate_description_vs_image(self, description: str, vision_results: Dict) -> int:
-        """Verifica se a descrição bate com o que vê na imagem"""
+        """
+        Verifica se a descrição bate com o que vê na imagem
         
-        desc_words = description.lower().split()
-        detected_labels = vision_results["labels"]
-        detected_text = vision_results["text"].lower()
+        Compara radicais sem acento, com tradução PT->EN para as labels
+        ("garrafas plásticas" casa com "plastic bottle"); ver services/text_analysis.py
+        """
         
         # Palavras da descrição que aparecem na imagem
-        matches = 0
-        relevant_words = [word for word in desc_words if len(word) > 3]  # Só palavras relevantes
-        
-        for word in relevant_words:
-            if (any(word in label for label in detected_labels) or 
-                word in detected_text):
-                matches += 1
+        matches, relevant_words = match_description(
+            description, vision_results["labels"], vision_results["text"]
+        )
         
         if not relevant_words:
             return 10
         
-        match_percentage = (matches / len(relevant_words)) * 100
+        match_percentage = (matches / relevant_words) * 100
         return min(30, int(match_percentage * 0.3))  # Max 30 pontos
     
-    def validate_location_context(self, location: Dict, category: str) -> int:
+    def validate_location_context(self, location: Dict, category: str, rules: CompiledRules = None) -> int:
         """Valida se a localização faz sentido para a categoria"""
+        rules = rules or self.rules
         
         latitude = location.get('latitude', 0)
         longitude = location.get('longitude', 0)
@@ -184,8 +246,7 @@ class SmartDenunciaValidator:
             score += 15
         
         # Verifica contexto no endereço
-        coastal_words = ['praia', 'beach', 'costa', 'mar', 'oceano', 'litoral']
-        if any(word in address for word in coastal_words):
+        if rules.coastal_matcher.contains_any(address):
             score += 10
         
         # Categoria específica vs localização
@@ -195,106 +256,98 @@ class SmartDenunciaValidator:
         
         return min(25, score)  # Max 25 pontos
     
-    def detect_spam_patterns(self, description: str, vision_results: Dict) -> int:
+    def detect_spam_patterns(self, description: str, vision_results: Dict, rules: CompiledRules = None) -> int:
         """Detecta padrões de spam ou denúncias falsas"""
-        
-        spam_indicators = [
-            'teste', 'test', 'fake', 'brincadeira', 'joke', 'meme',
-            'asdf', 'qwerty', '123', 'abc'
-        ]
+        rules = rules or self.rules
         
         # Verificar descrição muito curta ou suspeita
         if len(description.strip()) < 10:
             return -20
         
-        desc_lower = description.lower()
-        spam_count = sum(1 for indicator in spam_indicators if indicator in desc_lower)
-        
-        if spam_count > 0:
+        if rules.spam_matcher.contains_any(description.lower()):
             return -30
         
-        # Verificar se é selfie ou foto não relacionada
+        # Verificar se é selfie ou foto não relacionada (labels exatas)
         labels = vision_results["labels"]
-        non_environmental = ['person', 'selfie', 'food', 'party', 'celebration', 'indoor']
         
-        if any(label in labels for label in non_environmental):
-            if not any(env_word in labels for env_word in ['water', 'nature', 'outdoor', 'pollution']):
+        if not rules.non_environmental_set.isdisjoint(labels):
+            if rules.environmental_context_set.isdisjoint(labels):
                 return -25
         
         return 0  # Sem penalidades
     
     def calculate_final_validation(self, category_score: int, description_score: int, 
-                                 location_score: int, spam_score: int, vision_results: Dict) -> Dict:
+                                 location_score: int, spam_score: int, vision_results: Dict,
+                                 label_matches: List[frozenset] = None,
+                                 rules: CompiledRules = None) -> Dict:
         """Calcula validação final e retorna resultado completo - VERSÃO RIGOROSA"""
+        rules = rules or self.rules
         
+        w = rules.scoring
         total_score = category_score + description_score + location_score + spam_score
         
         # 🚨 DETECÇÃO RIGOROSA DE IMAGENS IRRELEVANTES
         detected_labels = vision_results["labels"]
+        if label_matches is None:
+            label_matches = rules.match_labels(detected_labels)
         
-        # 🚫 REJEITAR IMAGENS CLARAMENTE IRRELEVANTES
-        irrelevant_indicators = [
-            'person', 'people', 'human face', 'selfie', 'portrait',
-            'food', 'meal', 'restaurant', 'kitchen', 'cooking',
-            'party', 'celebration', 'festival', 'concert', 'music',
-            'indoor', 'bedroom', 'living room', 'office', 'classroom',
-            'car interior', 'vehicle interior', 'airplane', 'train',
-            'meme', 'text overlay', 'screenshot', 'computer screen',
-            'animal (pet)', 'cat', 'dog', 'domestic animal'
+        # Irrelevantes e contexto externo comparam a label em minúsculas
+        lower_matches = [
+            found if label == label.lower() else rules.label_matcher.find(label.lower())
+            for label, found in zip(detected_labels, label_matches)
         ]
         
-        irrelevant_detected = [label for label in detected_labels 
-                              if any(irrelevant in label.lower() for irrelevant in irrelevant_indicators)]
+        # 🚫 REJEITAR IMAGENS CLARAMENTE IRRELEVANTES
+        irrelevant_detected = [label for label, found in zip(detected_labels, lower_matches)
+                              if not found.isdisjoint(rules.irrelevant_set)]
         
         if irrelevant_detected:
             print(f"🚫 IMAGEM IRRELEVANTE detectada: {irrelevant_detected}")
-            total_score -= 40  # Penalidade SEVERA
+            total_score -= w["irrelevant_penalty"]  # Penalidade SEVERA
         
         # 🌍 BONUS RIGOROSO por detecção de problemas ambientais
-        environmental_labels = ['pollution', 'waste', 'garbage', 'oil', 'dead', 'damage', 'litter', 'plastic', 'trash']
-        environmental_detected = [label for label in detected_labels if any(env_word in label for env_word in environmental_labels)]
+        environmental_detected = [label for label, found in zip(detected_labels, label_matches)
+                                  if not found.isdisjoint(rules.environmental_set)]
         
         environmental_bonus = 0
         if environmental_detected:
-            environmental_bonus = len(environmental_detected) * 12  # 12 pontos por label ambiental
-            total_score += min(35, environmental_bonus)  # Máximo 35 pontos de bonus
-            print(f"🌍 Labels ambientais detectadas: {environmental_detected} (+{min(35, environmental_bonus)} pontos)")
+            environmental_bonus = len(environmental_detected) * w["environmental_points_per_label"]  # Pontos por label ambiental
+            total_score += min(w["environmental_bonus_max"], environmental_bonus)  # Máximo de bonus
+            print(f"🌍 Labels ambientais detectadas: {environmental_detected} (+{min(w['environmental_bonus_max'], environmental_bonus)} pontos)")
         
         # 🌊 BONUS EXTRA para poluição aquática específica  
-        water_pollution_labels = ['water', 'ocean', 'sea', 'marine', 'aquatic', 'beach', 'coast']
-        water_detected = any(water_word in label for label in detected_labels for water_word in water_pollution_labels)
+        water_detected = any(not found.isdisjoint(rules.water_set) for found in label_matches)
         
         if water_detected and environmental_detected:
-            total_score += 25  # Bonus extra para poluição marinha
-            print(f"🌊 Poluição aquática detectada! (+25 pontos)")
+            total_score += w["water_pollution_bonus"]  # Bonus extra para poluição marinha
+            print(f"🌊 Poluição aquática detectada! (+{w['water_pollution_bonus']} pontos)")
         
         # 🔍 VERIFICAÇÃO RIGOROSA DE CONTEXTO AMBIENTAL
-        outdoor_context = any(word in label.lower() for label in detected_labels 
-                             for word in ['outdoor', 'nature', 'landscape', 'sky', 'ground'])
+        outdoor_context = any(not found.isdisjoint(rules.outdoor_set) for found in lower_matches)
         
         if not outdoor_context and not environmental_detected:
             print(f"⚠️ SEM CONTEXTO AMBIENTAL detectado")
-            total_score -= 25  # Penalidade por falta de contexto ambiental
+            total_score -= w["no_context_penalty"]  # Penalidade por falta de contexto ambiental
         
         # Safe search - penalizar conteúdo inadequado
         safe_search = vision_results.get("safe_search")
-        if safe_search and (safe_search.adult.name != 'VERY_UNLIKELY' or 
-                           safe_search.violence.name != 'VERY_UNLIKELY'):
-            total_score -= 30
+        if safe_search and (safe_search.get("adult") != 'VERY_UNLIKELY' or 
+                           safe_search.get("violence") != 'VERY_UNLIKELY'):
+            total_score -= w["unsafe_content_penalty"]
         
         # 📊 SCORING MAIS RIGOROSO
         # Normalizar score (0-100) - Base menor e threshold maior
-        final_score = max(0, min(100, total_score + 45))  # Base 45 (era 60)
+        final_score = max(0, min(100, total_score + w["base_score"]))  # Base 45 (era 60)
         
         # 🎯 THRESHOLD MAIS RIGOROSO: 65 ao invés de 50
-        is_valid = final_score >= 65  # Era 50, agora 65
+        is_valid = final_score >= w["approval_threshold"]  # Era 50, agora 65
         
         # ⚡ REGRAS EXTRAS DE REJEIÇÃO
         if irrelevant_detected and len(environmental_detected) == 0:
             is_valid = False  # Rejeitar automaticamente se irrelevante e sem ambiente
-            final_score = min(final_score, 30)  # Cap no score
+            final_score = min(final_score, w["irrelevant_score_cap"])  # Cap no score
         
-        if final_score < 40:  # Score muito baixo = automático rejeitado
+        if final_score < w["min_valid_score"]:  # Score muito baixo = automático rejeitado
             is_valid = False
         
         validation_details = {
@@ -307,6 +360,8 @@ class SmartDenunciaValidator:
             "environmental_labels": environmental_detected,
             "irrelevant_labels": irrelevant_detected,
             "has_outdoor_context": outdoor_context,
+            "vision_backend": vision_results.get("backend", "google"),
+            "rules_version": rules.version,
             "validation_method": "google_vision_ai_rigorous_v3"
         }
         
@@ -320,14 +375,7 @@ class SmartDenunciaValidator:
     
     def is_coastal_area(self, lat: float, lng: float) -> bool:
         """Verifica se coordenadas são de área costeira"""
-        # Para Paraíba (pode expandir para outras regiões) - Área costeira da PB: aproximadamente
-        pb_coastal_bounds = {
-            "lat_min": -7.5, "lat_max": -6.5,
-            "lng_min": -35.2, "lng_max": -34.8
-        }
-        
-        return (pb_coastal_bounds["lat_min"] <= lat <= pb_coastal_bounds["lat_max"] and
-                pb_coastal_bounds["lng_min"] <= lng <= pb_coastal_bounds["lng_max"])
+        return is_coastal_area(lat, lng)
     
     def fallback_validation(self) -> Dict:
         """Validação fallback se API falhar"""
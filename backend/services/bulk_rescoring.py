@@ -0,0 +1,201 @@
+# services/bulk_rescoring.py
+from typing import Dict, List
+
+import numpy as np
+
+
+class BulkRescorer:
+    """
+    📐 Re-score vetorizado das validações armazenadas
+
+    Reproduz `SmartDenunciaValidator.calculate_final_validation` para um
+    bloco de denúncias de uma vez. Cada label distinta é casada uma só vez
+    com as palavras-chave, gerando uma matriz de incidência
+    label x palavra-chave; a matriz denúncia x label multiplicada por ela
+    dá todas as contagens com operações NumPy.
+
+    Os componentes de texto (descrição, localização, spam) continuam
+    calculados pelo validador, linha a linha.
+
+    As regras são fixadas na criação: todo o re-score usa a mesma versão.
+    """
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.rules = rules = validator.rules
+
+        keywords = rules.label_matcher.keywords
+        self.keyword_index = {keyword: i for i, keyword in enumerate(keywords)}
+        n_keywords = len(keywords)
+
+        def mask(words) -> np.ndarray:
+            vector = np.zeros(n_keywords, dtype=bool)
+            for word in words:
+                vector[self.keyword_index[word]] = True
+            return vector
+
+        self.irrelevant_mask = mask(rules.irrelevant_indicators)
+        self.environmental_mask = mask(rules.environmental_labels)
+        self.water_mask = mask(rules.water_pollution_labels)
+        self.outdoor_mask = mask(rules.outdoor_context_labels)
+
+        # Uma linha por categoria; a última (vazia) é para categorias não mapeadas
+        categories = list(rules.category_expected_objects)
+        self.category_index = {category: i for i, category in enumerate(categories)}
+        self.category_masks = np.zeros((len(categories) + 1, n_keywords), dtype=bool)
+        self.category_sizes = np.zeros(len(categories) + 1, dtype=np.int64)
+        for category, expected in rules.category_expected_objects.items():
+            i = self.category_index[category]
+            self.category_masks[i] = mask(expected)
+            self.category_sizes[i] = len(expected)
+
+        # Incidência de cada label já vista (reaproveitada entre blocos)
+        self._label_rows: Dict[str, np.ndarray] = {}
+
+    def _label_row(self, label: str) -> np.ndarray:
+        row = self._label_rows.get(label)
+        if row is None:
+            row = np.zeros(len(self.keyword_index), dtype=bool)
+            for keyword in self.rules.label_matcher.find(label):
+                row[self.keyword_index[keyword]] = True
+            self._label_rows[label] = row
+        return row
+
+    def score_chunk(self, rows: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Calcula score e decisão de um bloco
+
+        rows: dicts com id, category, description, latitude, longitude,
+              address e vision_results
+
+        Returns:
+            dict de arrays: id, confidence_score, is_valid e os componentes
+            gravados em validation_details (category_match, description_match,
+            location_relevance, spam_detection, environmental_bonus,
+            has_outdoor_context), mais as listas por denúncia
+            environmental_labels e irrelevant_labels
+        """
+        v = self.validator
+        w = self.rules.scoring
+        n = len(rows)
+
+        # --- Matrizes de incidência ---
+        vocabulary: Dict[str, int] = {}
+        report_label_pairs = []
+        for r, row in enumerate(rows):
+            for label in row["vision_results"].get("labels") or []:
+                report_label_pairs.append((r, vocabulary.setdefault(label, len(vocabulary))))
+
+        labels = list(vocabulary)
+        if labels:
+            incidence = np.stack([self._label_row(label) for label in labels])
+            # Irrelevantes e contexto externo comparam a label em minúsculas
+            incidence_lower = np.stack([self._label_row(label.lower()) for label in labels])
+        else:
+            incidence = np.zeros((0, len(self.keyword_index)), dtype=bool)
+            incidence_lower = incidence
+
+        # Denúncia x label (contagem, labels repetidas contam de novo)
+        reports_labels = np.zeros((n, len(labels)), dtype=np.int64)
+        if report_label_pairs:
+            pairs = np.array(report_label_pairs)
+            np.add.at(reports_labels, (pairs[:, 0], pairs[:, 1]), 1)
+
+        # Propriedades por label
+        label_irrelevant = (incidence_lower & self.irrelevant_mask).any(axis=1).astype(np.int64)
+        label_environmental = (incidence & self.environmental_mask).any(axis=1).astype(np.int64)
+        label_water = (incidence & self.water_mask).any(axis=1).astype(np.int64)
+        label_outdoor = (incidence_lower & self.outdoor_mask).any(axis=1).astype(np.int64)
+
+        # Contagens por denúncia
+        irrelevant_count = reports_labels @ label_irrelevant
+        environmental_count = reports_labels @ label_environmental
+        water_detected = (reports_labels @ label_water) > 0
+        outdoor_context = (reports_labels @ label_outdoor) > 0
+
+        # --- Categoria vs imagem ---
+        keywords_found = (reports_labels @ incidence.astype(np.int64)) > 0
+        category_rows = np.array([
+            self.category_index.get(row["category"], len(self.category_index)) for row in rows
+        ], dtype=np.int64)
+        expected_found = (keywords_found & self.category_masks[category_rows]).sum(axis=1)
+        expected_sizes = self.category_sizes[category_rows]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            match_percentage = (expected_found / expected_sizes) * 100
+            category_score = np.minimum(40, np.trunc(match_percentage * 0.4))
+        category_score = np.where(expected_sizes == 0, 20, category_score).astype(np.int64)
+
+        # --- Componentes de texto (linha a linha) ---
+        description_score = np.empty(n, dtype=np.int64)
+        location_score = np.empty(n, dtype=np.int64)
+        spam_score = np.empty(n, dtype=np.int64)
+        unsafe = np.zeros(n, dtype=bool)
+
+        for r, row in enumerate(rows):
+            vision_results = row["vision_results"]
+            vision_results.setdefault("text", "")
+            location = {
+                "latitude": row["latitude"],
+                "longitude": row["longitude"],
+                "address": row["address"] or f"Lat: {row['latitude']}, Long: {row['longitude']}"
+            }
+            description_score[r] = v.validate_description_vs_image(row["description"], vision_results)
+            location_score[r] = v.validate_location_context(location, row["category"], self.rules)
+            spam_score[r] = v.detect_spam_patterns(row["description"], vision_results, self.rules)
+
+            safe_search = vision_results.get("safe_search")
+            unsafe[r] = bool(safe_search) and (
+                safe_search.get("adult") != 'VERY_UNLIKELY' or
+                safe_search.get("violence") != 'VERY_UNLIKELY'
+            )
+
+        # --- Labels listadas em validation_details (mesma ordem e repetições do Vision) ---
+        environmental_labels: List[List[str]] = []
+        irrelevant_labels: List[List[str]] = []
+        for row in rows:
+            row_labels = row["vision_results"].get("labels") or []
+            environmental_labels.append([
+                label for label in row_labels if label_environmental[vocabulary[label]]
+            ])
+            irrelevant_labels.append([
+                label for label in row_labels if label_irrelevant[vocabulary[label]]
+            ])
+
+        # --- Decisão final (mesmas regras de calculate_final_validation) ---
+        has_irrelevant = irrelevant_count > 0
+        has_environmental = environmental_count > 0
+
+        total = category_score + description_score + location_score + spam_score
+        total -= np.where(has_irrelevant, w["irrelevant_penalty"], 0)
+        total += np.where(
+            has_environmental,
+            np.minimum(w["environmental_bonus_max"], environmental_count * w["environmental_points_per_label"]),
+            0
+        )
+        total += np.where(water_detected & has_environmental, w["water_pollution_bonus"], 0)
+        total -= np.where(~outdoor_context & ~has_environmental, w["no_context_penalty"], 0)
+        total -= np.where(unsafe, w["unsafe_content_penalty"], 0)
+
+        final_score = np.clip(total + w["base_score"], 0, 100)
+        is_valid = final_score >= w["approval_threshold"]
+
+        rejected_irrelevant = has_irrelevant & ~has_environmental
+        is_valid &= ~rejected_irrelevant
+        final_score = np.where(rejected_irrelevant, np.minimum(final_score, w["irrelevant_score_cap"]), final_score)
+
+        is_valid &= final_score >= w["min_valid_score"]
+
+        return {
+            "id": np.array([row["id"] for row in rows], dtype=np.int64),
+            "confidence_score": final_score.astype(np.int64),
+            "is_valid": is_valid,
+            "category_match": category_score,
+            "description_match": description_score,
+            "location_relevance": location_score,
+            "spam_detection": spam_score,
+            "environmental_bonus": environmental_count * w["environmental_points_per_label"],
+            "has_outdoor_context": outdoor_context,
+            "environmental_labels": environmental_labels,
+            "irrelevant_labels": irrelevant_labels
+        }
@@ -0,0 +1,107 @@
+# services/denuncia_queries.py
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from database.models import Denuncia, VALIDATED_MIN_SCORE
+
+# Tamanho de página padrão e máximo das listagens
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+# Colunas das respostas de listagem (DenunciaList em main.py): sem
+# validation_details, vision_results e os demais campos pesados
+LIST_COLUMNS = (
+    Denuncia.id, Denuncia.description, Denuncia.latitude, Denuncia.longitude,
+    Denuncia.address, Denuncia.category, Denuncia.status, Denuncia.image_filename,
+    Denuncia.image_path, Denuncia.image_variants, Denuncia.created_at,
+    Denuncia.is_ai_validated, Denuncia.is_valid, Denuncia.validation_score
+)
+
+
+class InvalidCursorError(ValueError):
+    """Cursor de paginação malformado"""
+
+
+def encode_cursor(created_at: datetime, denuncia_id: int) -> str:
+    """🔖 Cursor opaco com a posição (created_at, id) do último item da página"""
+    raw = f"{created_at.isoformat()}|{denuncia_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, denuncia_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(denuncia_id)
+    except Exception:
+        raise InvalidCursorError("Cursor de paginação inválido")
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def filtered_denuncias(db: Session, category: Optional[str] = None, status: Optional[str] = None,
+                       created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+                       validated_only: bool = False, columns: Optional[Tuple] = None):
+    """
+    Consulta base das listagens com os filtros opcionais
+
+    Com `columns` (ex.: LIST_COLUMNS) as linhas vêm como tuplas só com
+    essas colunas, sem montar entidades ORM.
+    """
+    query = db.query(*columns) if columns else db.query(Denuncia)
+    if validated_only:
+        query = query.filter(
+            Denuncia.is_ai_validated == True,
+            Denuncia.is_valid == True,
+            Denuncia.validation_score >= VALIDATED_MIN_SCORE
+        )
+    if category:
+        query = query.filter(Denuncia.category == category)
+    if status:
+        query = query.filter(Denuncia.status == status)
+    if created_from:
+        query = query.filter(Denuncia.created_at >= created_from)
+    if created_to:
+        query = query.filter(Denuncia.created_at < created_to)
+    return query
+
+
+def page_query(query, limit: int, cursor: Optional[str] = None):
+    """
+    Consulta de uma página (sem executar): filtro do cursor, ordem e limite
+
+    Traz um item a mais só para saber se existe próxima página. Separada de
+    page_denuncias para check_query_plans.py conferir o plano da consulta real.
+    """
+    if cursor:
+        created_at, denuncia_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Denuncia.created_at, Denuncia.id) < tuple_(created_at, denuncia_id))
+    return query.order_by(Denuncia.created_at.desc(), Denuncia.id.desc()).limit(limit + 1)
+
+
+def page_denuncias(query, limit: int, cursor: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    📄 Uma página da consulta, da mais recente para a mais antiga
+
+    Paginação por chave (keyset) em (created_at, id): a próxima página começa
+    logo depois do último item visto, usando o índice, sem OFFSET. O custo
+    é o mesmo na primeira página e na milésima.
+
+    Funciona com entidades ou com tuplas que incluam created_at e id.
+
+    Returns:
+        (denúncias, cursor da próxima página ou None)
+    """
+    rows = page_query(query, limit, cursor).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
@@ -0,0 +1,87 @@
+# services/denuncia_search.py
+import base64
+from typing import List, Optional, Tuple
+
+from sqlalchemy import cast, func, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import REAL, TSVECTOR
+from sqlalchemy.orm import Session
+
+from database.models import Denuncia
+from services.denuncia_queries import LIST_COLUMNS, InvalidCursorError
+
+# Configuração criada na migração 0004 (português + unaccent)
+SEARCH_CONFIG = "pt_unaccent"
+
+# Tamanho de página padrão e máximo da busca
+DEFAULT_SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_PAGE_SIZE = 200
+
+# Trechos destacados: até 2 fragmentos, termos entre <mark></mark>
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+
+# Coluna gerada pela migração 0004 (fora do modelo ORM, ver a migração)
+search_vector = literal_column("denuncias.search_vector", type_=TSVECTOR)
+
+
+def _config():
+    return literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+
+def encode_search_cursor(rank: float, denuncia_id: int) -> str:
+    """🔖 Cursor opaco com a posição (relevância, id) do último resultado da página"""
+    raw = f"{rank!r}|{denuncia_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, denuncia_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return float(rank), int(denuncia_id)
+    except Exception:
+        raise InvalidCursorError("Cursor de busca inválido")
+
+
+def search_query(db: Session, q: str, category: Optional[str] = None):
+    """
+    Consulta das denúncias que casam com `q` (sintaxe de busca web:
+    "frase exata", OR, -excluir), com a relevância como coluna `rank`
+
+    O filtro `search_vector @@ tsquery` usa o índice GIN.
+    """
+    tsquery = func.websearch_to_tsquery(_config(), q)
+    rank = func.ts_rank_cd(search_vector, tsquery)
+
+    query = db.query(*LIST_COLUMNS, rank.label("rank")).filter(search_vector.op("@@")(tsquery))
+    if category:
+        query = query.filter(Denuncia.category == category)
+    return query, rank
+
+
+def search_denuncias(db: Session, q: str, limit: int, cursor: Optional[str] = None,
+                     category: Optional[str] = None) -> Tuple[List, Optional[str]]:
+    """
+    🔎 Uma página da busca, da mais relevante para a menos relevante
+
+    Paginação por chave em (relevância, id). O trecho destacado
+    (ts_headline, caro) só é calculado para as linhas da página.
+
+    Returns:
+        (linhas com as colunas da listagem + rank + snippet, cursor da próxima página ou None)
+    """
+    query, rank = search_query(db, q, category)
+    if cursor:
+        last_rank, last_id = decode_search_cursor(cursor)
+        query = query.filter(tuple_(rank, Denuncia.id) < tuple_(cast(last_rank, REAL), last_id))
+
+    page = query.order_by(rank.desc(), Denuncia.id.desc()).limit(limit + 1).subquery()
+    snippet = func.ts_headline(
+        _config(), page.c.description, func.websearch_to_tsquery(_config(), q), HEADLINE_OPTIONS
+    )
+    rows = db.query(page, snippet.label("snippet")).order_by(page.c.rank.desc(), page.c.id.desc()).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1].rank, rows[-1].id)
+    return rows, next_cursor
@@ -0,0 +1,119 @@
+# services/geo.py
+import math
+from typing import List, Tuple
+
+# Raio médio da Terra (metros)
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """📍 Distância em metros entre dois pontos (fórmula de haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+# Área costeira da Paraíba (pode expandir para outras regiões): aproximadamente
+PB_COASTAL_BOUNDS = {
+    "lat_min": -7.5, "lat_max": -6.5,
+    "lng_min": -35.2, "lng_max": -34.8
+}
+
+
+def is_coastal_area(lat: float, lng: float) -> bool:
+    """🏖️ Verifica se coordenadas são de área costeira"""
+    return (PB_COASTAL_BOUNDS["lat_min"] <= lat <= PB_COASTAL_BOUNDS["lat_max"] and
+            PB_COASTAL_BOUNDS["lng_min"] <= lng <= PB_COASTAL_BOUNDS["lng_max"])
+
+
+# Metros por grau de latitude (aproximadamente constante)
+METERS_PER_DEGREE = 111320.0
+
+
+def grid_cell(lat: float, lng: float, cell_deg: float) -> str:
+    """🧭 Célula "linha:coluna" de uma grade regular em graus"""
+    return f"{math.floor(lat / cell_deg)}:{math.floor(lng / cell_deg)}"
+
+
+def grid_cells_around(lat: float, lng: float, radius_m: float, cell_deg: float) -> List[str]:
+    """Células da grade que cobrem o círculo de raio `radius_m` em volta do ponto"""
+    dlat = radius_m / METERS_PER_DEGREE
+    dlng = radius_m / (METERS_PER_DEGREE * max(0.01, math.cos(math.radians(lat))))
+
+    rows = range(math.floor((lat - dlat) / cell_deg), math.floor((lat + dlat) / cell_deg) + 1)
+    cols = range(math.floor((lng - dlng) / cell_deg), math.floor((lng + dlng) / cell_deg) + 1)
+    return [f"{row}:{col}" for row in rows for col in cols]
+
+
+# --- Geohash ---
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precisão gravada em denuncias.geohash (9 caracteres ≈ 5m x 5m)
+GEOHASH_PRECISION = 9
+
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """🔷 Geohash do ponto: prefixos iguais = células vizinhas, indexável em B-tree"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Bits alternam: longitude, latitude, longitude...
+
+    while len(chars) < precision:
+        value, interval = (lng, lng_range) if even else (lat, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            interval[0] = mid
+        else:
+            bits = bits << 1
+            interval[1] = mid
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(altura, largura) em graus de uma célula com essa precisão"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def geohash_cover(min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                  max_cells: int = 32) -> List[str]:
+    """
+    Prefixos geohash que cobrem o retângulo
+
+    Usa a maior precisão em que a cobertura cabe em `max_cells` células:
+    cada prefixo vira um intervalo no índice (geohash >= p AND geohash < p + "{").
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = geohash_cell_size(precision)
+        rows = math.floor(max_lat / height) - math.floor(min_lat / height) + 1
+        cols = math.floor(max_lng / width) - math.floor(min_lng / width) + 1
+        if rows * cols <= max_cells or precision == 1:
+            break
+
+    cells = set()
+    first_row, first_col = math.floor(min_lat / height), math.floor(min_lng / width)
+    for row in range(rows):
+        for col in range(cols):
+            # Centro de cada célula da grade, limitado ao globo
+            lat = min(89.999999, max(-90.0, (first_row + row + 0.5) * height))
+            lng = min(179.999999, max(-180.0, (first_col + col + 0.5) * width))
+            cells.add(geohash_encode(lat, lng, precision))
+    return sorted(cells)
@@ -0,0 +1,142 @@
+# services/image_processing.py
+import os
+import asyncio
+import logging
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from PIL import Image, ImageOps
+
+# Lado maior de cada variante (em pixels)
+# O Vision recomenda ~1024x768 para OCR; acima disso só aumenta o payload
+VISION_MAX_SIDE = int(os.getenv("VISION_IMAGE_MAX_SIDE", "1280"))
+MEDIUM_MAX_SIDE = int(os.getenv("MEDIUM_IMAGE_MAX_SIDE", "800"))
+THUMBNAIL_MAX_SIDE = int(os.getenv("THUMBNAIL_MAX_SIDE", "256"))
+
+JPEG_QUALITY = int(os.getenv("VARIANT_JPEG_QUALITY", "85"))
+
+# Número de processos para o pré-processamento (padrão: metade dos CPUs)
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+VARIANTS = {
+    "vision": VISION_MAX_SIDE,
+    "medium": MEDIUM_MAX_SIDE,
+    "thumbnail": THUMBNAIL_MAX_SIDE,
+}
+
+
+def variant_path(image_path: str, variant: str) -> Path:
+    """Caminho da variante, ao lado da imagem original"""
+    original = Path(image_path)
+    return original.with_name(f"{original.stem}_{variant}.jpg")
+
+
+def dhash(img: Image.Image, hash_size: int = 8) -> str:
+    """
+    🔍 Hash perceptual (dHash) de 64 bits em hexadecimal
+
+    Compara o brilho de pixels vizinhos numa versão 9x8 em tons de cinza:
+    sobrevive a recompressão, redimensionamento e pequenos ajustes de cor,
+    ao contrário do SHA-256 do arquivo.
+    """
+    small = img.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:0{hash_size * hash_size // 4}x}"
+
+
+def _save_atomic(img: Image.Image, path: Path):
+    """
+    Grava o JPEG num temporário único e troca pelo destino (os.replace)
+
+    Imagens idênticas compartilham o arquivo: dois workers podem gerar a
+    mesma variante ao mesmo tempo, cada um com o seu temporário.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f".{path.stem}-", suffix=".tmp", delete=False) as tmp:
+        tmp_path = tmp.name
+        try:
+            img.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True)
+        except Exception:
+            tmp.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+def normalize_image(image_path: str) -> Dict:
+    """
+    🖼️ Normaliza a imagem e gera as variantes (roda em processo separado)
+
+    - Aplica a orientação EXIF
+    - Converte para RGB
+    - Reduz e re-codifica em JPEG para cada variante
+    - Calcula o hash perceptual sobre a miniatura
+
+    Returns:
+        dict: {'vision': str, 'medium': str, 'thumbnail': str, 'width': int, 'height': int, 'phash': str}
+    """
+    paths = {name: variant_path(image_path, name) for name in VARIANTS}
+
+    with Image.open(image_path) as img:
+        width, height = img.size
+
+        # Imagens idênticas compartilham o mesmo arquivo: variantes já existem
+        if all(p.exists() for p in paths.values()):
+            with Image.open(paths["thumbnail"]) as thumbnail:
+                phash = dhash(thumbnail)
+            return {**{name: str(p) for name, p in paths.items()}, "width": width, "height": height, "phash": phash}
+
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        width, height = img.size
+
+        # Da maior para a menor, reaproveitando a redução anterior
+        current = img
+        for name, max_side in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+            if max(current.size) > max_side:
+                current = current.copy()
+                current.thumbnail((max_side, max_side), Image.LANCZOS)
+
+            _save_atomic(current, paths[name])
+
+        # Mesma entrada do caminho acima (a miniatura), para hashes comparáveis
+        with Image.open(paths["thumbnail"]) as thumbnail:
+            phash = dhash(thumbnail)
+
+    return {**{name: str(p) for name, p in paths.items()}, "width": width, "height": height, "phash": phash}
+
+
+class ImageProcessor:
+    """⚙️ Executa a normalização de imagens num pool de processos"""
+
+    def __init__(self, max_workers: int = IMAGE_PROCESS_WORKERS):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def process(self, image_path: str) -> Optional[Dict]:
+        """Normaliza a imagem sem bloquear o event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.pool, normalize_image, image_path)
+        except Exception as e:
+            logging.error(f"Erro ao normalizar imagem '{image_path}': {e}")
+            return None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,75 @@
+# services/image_store.py
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from services.upload_service import ingest_upload, MAX_UPLOAD_BYTES
+
+
+class ContentAddressedImageStore:
+    """
+    🗂️ Armazenamento de imagens endereçado pelo conteúdo (SHA-256)
+
+    Layout em disco: <root>/<ab>/<cd>/<sha256>.<ext>
+    Imagens idênticas ocupam um único arquivo.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.tmp_dir = self.root / "tmp"
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def shard_dir(self, sha256: str) -> Path:
+        """Diretório do shard de um hash (dois níveis de 2 caracteres)"""
+        return self.root / sha256[:2] / sha256[2:4]
+
+    def find(self, sha256: str) -> Optional[Path]:
+        """Procura uma imagem já armazenada com esse hash"""
+        shard = self.shard_dir(sha256)
+        if not shard.is_dir():
+            return None
+        for candidate in shard.glob(f"{sha256}.*"):
+            return candidate
+        return None
+
+    def _commit(self, tmp_path: Path, sha256: str) -> Dict:
+        """Move o arquivo temporário para o shard definitivo (ou descarta se já existe)"""
+        existing = self.find(sha256)
+        if existing is not None:
+            tmp_path.unlink(missing_ok=True)
+            return {"path": existing, "is_new": False}
+
+        shard = self.shard_dir(sha256)
+        shard.mkdir(parents=True, exist_ok=True)
+        final_path = shard / f"{sha256}{tmp_path.suffix}"
+
+        # os.replace é atômico dentro do mesmo filesystem
+        os.replace(tmp_path, final_path)
+        return {"path": final_path, "is_new": True}
+
+    async def save(self, image: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> Dict:
+        """
+        💾 Salva o upload no store
+
+        Returns:
+            dict: {
+                'path': str,
+                'filename': str,
+                'sha256': str,
+                'size': int,
+                'is_new': bool
+            }
+        """
+        ingested = await ingest_upload(image, self.tmp_dir, max_bytes)
+        committed = await run_in_threadpool(self._commit, Path(ingested["path"]), ingested["sha256"])
+
+        return {
+            "path": str(committed["path"]),
+            "filename": committed["path"].name,
+            "sha256": ingested["sha256"],
+            "size": ingested["size"],
+            "is_new": committed["is_new"],
+        }
@@ -0,0 +1,193 @@
+# services/incidents.py
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from database.models import Denuncia, Incident
+from services.geo import haversine_m, grid_cell, grid_cells_around, METERS_PER_DEGREE
+
+# Denúncias da mesma categoria a até INCIDENT_RADIUS_M metros e com menos de
+# INCIDENT_WINDOW_HOURS horas desde a última denúncia formam uma só ocorrência
+INCIDENT_RADIUS_M = float(os.getenv("INCIDENT_RADIUS_M", "250"))
+INCIDENT_WINDOW_HOURS = float(os.getenv("INCIDENT_WINDOW_HOURS", "12"))
+
+# Método gravado por SmartDenunciaValidator.fallback_validation (Vision falhou):
+# o resultado não é um veredito de verdade e não deve ser reaproveitado
+FALLBACK_VALIDATION_METHOD = "fallback_manual_review_needed"
+
+# Método das denúncias que só copiaram o veredito da ocorrência
+INCIDENT_VERDICT_METHOD = "incident_verdict"
+
+# Lado da célula da grade (graus): igual ao raio, então a vizinhança cobre poucas células
+INCIDENT_GRID_DEG = INCIDENT_RADIUS_M / METERS_PER_DEGREE
+
+
+def find_open_incident(db: Session, category: str, latitude: float, longitude: float) -> Optional[Incident]:
+    """🔎 Ocorrência aberta mais próxima da mesma categoria dentro do raio"""
+    since = datetime.now(timezone.utc) - timedelta(hours=INCIDENT_WINDOW_HOURS)
+    candidates = db.query(Incident).filter(
+        Incident.category == category,
+        Incident.grid_cell.in_(grid_cells_around(latitude, longitude, INCIDENT_RADIUS_M, INCIDENT_GRID_DEG)),
+        Incident.last_reported_at >= since
+    ).all()
+
+    best, best_distance = None, None
+    for incident in candidates:
+        distance = haversine_m(latitude, longitude, incident.latitude, incident.longitude)
+        if distance <= INCIDENT_RADIUS_M and (best is None or distance < best_distance):
+            best, best_distance = incident, distance
+    return best
+
+
+def attach_to_incident(db: Session, denuncia: Denuncia) -> Incident:
+    """
+    🧩 Liga a denúncia a uma ocorrência aberta ou abre uma nova (sem commit)
+
+    Contadores são atualizados com expressões SQL, então requisições
+    simultâneas na mesma ocorrência não perdem incrementos.
+    """
+    incident = find_open_incident(db, denuncia.category, denuncia.latitude, denuncia.longitude)
+
+    if incident is None:
+        incident = Incident(
+            category=denuncia.category,
+            latitude=denuncia.latitude,
+            longitude=denuncia.longitude,
+            address=denuncia.address,
+            grid_cell=grid_cell(denuncia.latitude, denuncia.longitude, INCIDENT_GRID_DEG),
+            report_count=1
+        )
+        db.add(incident)
+        db.flush()
+    else:
+        db.query(Incident).filter(Incident.id == incident.id).update({
+            Incident.report_count: Incident.report_count + 1,
+            Incident.last_reported_at: datetime.now(timezone.utc)
+        }, synchronize_session=False)
+
+    denuncia.incident_id = incident.id
+    return incident
+
+
+def is_fallback_validation(validation_details: Optional[dict]) -> bool:
+    """Resultado de contingência (sem análise real do Vision)?"""
+    return (validation_details or {}).get("validation_method") == FALLBACK_VALIDATION_METHOD
+
+
+def fallback_validation_filter():
+    """Filtro SQL das denúncias cujo resultado é de contingência"""
+    return Denuncia.validation_details["validation_method"].as_string() == FALLBACK_VALIDATION_METHOD
+
+
+def real_validation_filter():
+    """Filtro SQL das denúncias validadas pela AI de verdade (sem contingência)"""
+    method = func.coalesce(Denuncia.validation_details["validation_method"].as_string(), "")
+    return and_(Denuncia.is_ai_validated == True, method != FALLBACK_VALIDATION_METHOD)
+
+
+def incident_has_verdict(db: Session, incident: Incident) -> bool:
+    """
+    Ocorrência tem um veredito reaproveitável?
+
+    Vereditos gravados a partir de um resultado de contingência (antes
+    de record_incident_verdict ignorá-los) não contam.
+    """
+    if incident.is_valid is None:
+        return False
+    if not incident.verdict_denuncia_id:
+        return True
+    details = db.query(Denuncia.validation_details).filter(
+        Denuncia.id == incident.verdict_denuncia_id
+    ).scalar()
+    return not is_fallback_validation(details)
+
+
+def record_incident_verdict(db: Session, denuncia: Denuncia):
+    """
+    ⚖️ Primeira validação AI concluída vira o veredito da ocorrência (sem commit)
+
+    Resultados de contingência não viram veredito; um veredito antigo
+    vindo de contingência é substituído pela primeira validação real.
+    """
+    if not denuncia.incident_id or not denuncia.is_ai_validated:
+        return
+    if is_fallback_validation(denuncia.validation_details):
+        return
+    fallback_ids = select(Denuncia.id).where(fallback_validation_filter())
+    db.query(Incident).filter(
+        Incident.id == denuncia.incident_id,
+        or_(Incident.is_valid.is_(None), Incident.verdict_denuncia_id.in_(fallback_ids))
+    ).update({
+        Incident.is_valid: denuncia.is_valid,
+        Incident.validation_score: denuncia.validation_score,
+        Incident.verdict_denuncia_id: denuncia.id
+    }, synchronize_session=False)
+
+
+def refresh_incident_verdicts(db: Session, denuncia_ids: List[int]) -> int:
+    """
+    🔁 Propaga um novo resultado (ex.: re-score) para os vereditos (sem commit)
+
+    Ocorrências cujo veredito veio de uma das denúncias recebem o novo
+    is_valid/score, e as denúncias que só copiaram esse veredito
+    (validation_method "incident_verdict", sem status manual) também.
+    Retorna quantas ocorrências mudaram.
+    """
+    if not denuncia_ids:
+        return 0
+    incident_ids = db.execute(
+        update(Incident).where(
+            Incident.verdict_denuncia_id == Denuncia.id,
+            Denuncia.id.in_(denuncia_ids),
+            or_(Incident.is_valid.is_distinct_from(Denuncia.is_valid),
+                Incident.validation_score.is_distinct_from(Denuncia.validation_score))
+        ).values(
+            is_valid=Denuncia.is_valid,
+            validation_score=Denuncia.validation_score
+        ).returning(Incident.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    if not incident_ids:
+        return 0
+
+    db.execute(
+        update(Denuncia).where(
+            Denuncia.incident_id == Incident.id,
+            Incident.id.in_(incident_ids),
+            Denuncia.validation_details["validation_method"].as_string() == INCIDENT_VERDICT_METHOD,
+            Denuncia.status.in_(("validated", "rejected"))
+        ).values(
+            is_valid=Incident.is_valid,
+            validation_score=Incident.validation_score,
+            status=case((Incident.is_valid == True, "validated"), else_="rejected")
+        ).execution_options(synchronize_session=False)
+    )
+    return len(incident_ids)
+
+
+def apply_incident_verdict(denuncia: Denuncia, incident: Incident):
+    """♻️ Copia para a denúncia o veredito já conhecido da ocorrência"""
+    denuncia.is_ai_validated = True
+    denuncia.is_valid = incident.is_valid
+    denuncia.validation_score = incident.validation_score
+    denuncia.validation_details = {
+        "validation_method": INCIDENT_VERDICT_METHOD,
+        "incident_id": incident.id,
+        "verdict_from": incident.verdict_denuncia_id
+    }
+    denuncia.status = "validated" if incident.is_valid else "rejected"
+
+
+def list_incidents(db: Session, category: Optional[str] = None, only_open: bool = False,
+                   limit: int = 100) -> List[Incident]:
+    """📋 Ocorrências mais recentes primeiro"""
+    query = db.query(Incident)
+    if category:
+        query = query.filter(Incident.category == category)
+    if only_open:
+        since = datetime.now(timezone.utc) - timedelta(hours=INCIDENT_WINDOW_HOURS)
+        query = query.filter(Incident.last_reported_at >= since)
+
+    return query.order_by(Incident.last_reported_at.desc()).limit(limit).all()
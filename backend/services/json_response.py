@@ -0,0 +1,35 @@
+# services/json_response.py
+import os
+from typing import Iterator, Sequence
+
+import orjson
+from pydantic import TypeAdapter
+
+# Linhas validadas e serializadas por vez ao montar uma lista em streaming
+JSON_STREAM_CHUNK = int(os.getenv("JSON_STREAM_CHUNK", "200"))
+
+# Datas UTC saem com "Z", como na serialização padrão do FastAPI/Pydantic
+ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def dumps(data) -> bytes:
+    return orjson.dumps(data, option=ORJSON_OPTIONS)
+
+
+def iter_json_array(rows: Sequence, adapter: TypeAdapter, chunk_size: int = JSON_STREAM_CHUNK) -> Iterator[bytes]:
+    """
+    ⚡ Serializa uma lista JSON em pedaços
+
+    `adapter` é um TypeAdapter de List[Modelo]: cada bloco de linhas
+    (tuplas/Row com os nomes dos campos) é validado de uma vez, sem um
+    objeto ORM nem um `from_orm` por linha, e vira bytes com orjson.
+    Só um bloco existe como objetos Python por vez.
+    """
+    yield b"["
+    for start in range(0, len(rows), chunk_size):
+        items = adapter.validate_python(rows[start:start + chunk_size], from_attributes=True)
+        body = dumps(adapter.dump_python(items))
+        if start:
+            yield b","
+        yield body[1:-1]  # Sem os colchetes do bloco
+    yield b"]"
@@ -0,0 +1,83 @@
+# services/keyword_matcher.py
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List
+
+
+class KeywordMatcher:
+    """
+    🔎 Casamento de várias palavras-chave por substring (Aho-Corasick)
+
+    O autômato é montado uma vez; cada texto é percorrido em uma única
+    passada e retorna todas as palavras-chave contidas nele, equivalente a
+    `{kw for kw in keywords if kw in text}`.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+
+        # Estado 0 é a raiz
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [frozenset()]
+
+        self._build()
+
+    def _build(self):
+        outputs = [set()]
+
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = next_state
+            outputs[state].add(keyword)
+
+        # Links de falha em largura (BFS)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+
+                outputs[next_state] |= outputs[self._fail[next_state]]
+
+        self._output = [frozenset(out) for out in outputs]
+
+    def _step(self, state: int, char: str) -> int:
+        while state and char not in self._goto[state]:
+            state = self._fail[state]
+        return self._goto[state].get(char, 0)
+
+    def find(self, text: str) -> FrozenSet[str]:
+        """Todas as palavras-chave que aparecem em `text`"""
+        found = set()
+        state = 0
+        for char in text:
+            state = self._step(state, char)
+            if self._output[state]:
+                found |= self._output[state]
+        return frozenset(found)
+
+    def contains_any(self, text: str) -> bool:
+        """True se alguma palavra-chave aparece em `text` (para na primeira)"""
+        state = 0
+        for char in text:
+            state = self._step(state, char)
+            if self._output[state]:
+                return True
+        return False
+
+    def match_labels(self, labels: Iterable[str]) -> List[FrozenSet[str]]:
+        """Palavras-chave encontradas em cada label, na mesma ordem"""
+        return [self.find(label) for label in labels]
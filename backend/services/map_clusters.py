@@ -0,0 +1,163 @@
+# services/map_clusters.py
+import os
+import math
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, func, or_, text
+from sqlalchemy.orm import Session
+
+from database.models import DenunciaCluster, DenunciaClusterDelta
+from services.geo import geohash_cover, geohash_cell_size
+
+# Resoluções (tamanho do prefixo geohash) mantidas em denuncia_clusters
+MIN_CLUSTER_RESOLUTION = 2
+MAX_CLUSTER_RESOLUTION = 7
+
+# Tamanho aproximado de um cluster na tela (pixels)
+CLUSTER_CELL_PX = int(os.getenv("CLUSTER_CELL_PX", "64"))
+
+TILE_SIZE_PX = 256
+
+# Deltas somados em denuncia_clusters por chamada de fold_cluster_deltas
+CLUSTER_FOLD_BATCH = int(os.getenv("CLUSTER_FOLD_BATCH", "5000"))
+
+
+def resolution_for_zoom(zoom: float) -> int:
+    """
+    Resolução cuja largura de célula mais se aproxima de CLUSTER_CELL_PX no zoom
+
+    No zoom z (Web Mercator) um tile de 256px cobre 360 / 2^z graus de longitude.
+    """
+    target_width = 360.0 / (2 ** zoom) * CLUSTER_CELL_PX / TILE_SIZE_PX
+    return min(
+        range(MIN_CLUSTER_RESOLUTION, MAX_CLUSTER_RESOLUTION + 1),
+        key=lambda resolution: abs(math.log(geohash_cell_size(resolution)[1] / target_width))
+    )
+
+
+def parse_bbox(bbox: str):
+    """"min_lat,min_lng,max_lat,max_lng" -> tupla de floats (ValueError se inválido)"""
+    parts = [float(part) for part in bbox.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox deve ter 4 valores: min_lat,min_lng,max_lat,max_lng")
+    min_lat, min_lng, max_lat, max_lng = parts
+    if min_lat > max_lat or min_lng > max_lng:
+        raise ValueError("bbox inválido: min_lat/min_lng devem ser menores que max_lat/max_lng")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def _prefix_filter(column, prefixes: List[str]):
+    return or_(*[and_(column >= prefix, column < prefix + "{") for prefix in prefixes])
+
+
+def cluster_queries(db: Session, resolution: int, prefixes: List[str], category: Optional[str] = None):
+    """
+    Consultas dos agregados das células com os prefixos dados
+
+    Returns:
+        (agregados já somados em denuncia_clusters, deltas ainda não somados
+        agrupados na mesma resolução), ambas com cell, category, status,
+        count, sum_lat e sum_lng
+    """
+    aggregates = db.query(
+        DenunciaCluster.cell, DenunciaCluster.category, DenunciaCluster.status,
+        DenunciaCluster.count, DenunciaCluster.sum_lat, DenunciaCluster.sum_lng
+    ).filter(
+        DenunciaCluster.resolution == resolution,
+        DenunciaCluster.count > 0,
+        _prefix_filter(DenunciaCluster.cell, prefixes)
+    )
+
+    cell = func.left(DenunciaClusterDelta.geohash, resolution)
+    pending = db.query(
+        cell.label("cell"), DenunciaClusterDelta.category, DenunciaClusterDelta.status,
+        func.sum(DenunciaClusterDelta.delta).label("count"),
+        func.sum(DenunciaClusterDelta.latitude * DenunciaClusterDelta.delta).label("sum_lat"),
+        func.sum(DenunciaClusterDelta.longitude * DenunciaClusterDelta.delta).label("sum_lng")
+    ).filter(
+        _prefix_filter(DenunciaClusterDelta.geohash, prefixes)
+    ).group_by(cell, DenunciaClusterDelta.category, DenunciaClusterDelta.status)
+
+    if category:
+        aggregates = aggregates.filter(DenunciaCluster.category == category)
+        pending = pending.filter(DenunciaClusterDelta.category == category)
+    return aggregates, pending
+
+
+def bbox_prefixes(min_lat: float, min_lng: float, max_lat: float, max_lng: float, resolution: int) -> List[str]:
+    """Prefixos geohash (na resolução) das células que cobrem o retângulo"""
+    return sorted({prefix[:resolution] for prefix in geohash_cover(min_lat, min_lng, max_lat, max_lng)})
+
+
+def bbox_cluster_queries(db: Session, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                         zoom: float, category: Optional[str] = None):
+    """Consultas de cluster_queries para o retângulo, na resolução do zoom"""
+    resolution = resolution_for_zoom(zoom)
+    return cluster_queries(
+        db, resolution, bbox_prefixes(min_lat, min_lng, max_lat, max_lng, resolution), category
+    )
+
+
+def clusters_in_bbox(db: Session, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                     zoom: float, category: Optional[str] = None) -> Dict:
+    """
+    🗺️ Clusters das denúncias visíveis no mapa
+
+    Lê os agregados pré-calculados da resolução do zoom (uma linha por
+    célula/categoria/status, só das células que cobrem o retângulo) em vez
+    de varrer as denúncias, mais os deltas que o trigger gravou e o worker
+    ainda não somou. Cada cluster traz o centróide, o total e a divisão por
+    categoria e por status.
+    """
+    aggregates, pending = bbox_cluster_queries(db, min_lat, min_lng, max_lat, max_lng, zoom, category)
+
+    # (célula, categoria, status) -> [count, sum_lat, sum_lng]
+    groups: Dict[tuple, List[float]] = {}
+    for query in (aggregates, pending):
+        for row in query:
+            group = groups.setdefault((row.cell, row.category, row.status), [0, 0.0, 0.0])
+            group[0] += row.count
+            group[1] += row.sum_lat
+            group[2] += row.sum_lng
+
+    cells: Dict[str, Dict] = {}
+    for (cell, row_category, status), (count, sum_lat, sum_lng) in groups.items():
+        if count <= 0:
+            continue
+        cluster = cells.setdefault(cell, {
+            "cell": cell, "count": 0, "sum_lat": 0.0, "sum_lng": 0.0,
+            "by_category": {}, "by_status": {}
+        })
+        cluster["count"] += count
+        cluster["sum_lat"] += sum_lat
+        cluster["sum_lng"] += sum_lng
+        cluster["by_category"][row_category] = cluster["by_category"].get(row_category, 0) + count
+        cluster["by_status"][status] = cluster["by_status"].get(status, 0) + count
+
+    clusters: List[Dict] = []
+    for cluster in cells.values():
+        latitude = cluster.pop("sum_lat") / cluster["count"]
+        longitude = cluster.pop("sum_lng") / cluster["count"]
+        # Células da borda: só entram se o centróide está na área visível
+        if min_lat <= latitude <= max_lat and min_lng <= longitude <= max_lng:
+            clusters.append({"latitude": round(latitude, 6), "longitude": round(longitude, 6), **cluster})
+
+    clusters.sort(key=lambda cluster: cluster["count"], reverse=True)
+    return {
+        "zoom": zoom,
+        "resolution": resolution,
+        "total": sum(cluster["count"] for cluster in clusters),
+        "clusters": clusters
+    }
+
+
+def fold_cluster_deltas(db: Session, limit: int = CLUSTER_FOLD_BATCH) -> int:
+    """
+    🧮 Soma os deltas pendentes em denuncia_clusters e faz commit
+
+    Chamado periodicamente pelo worker. Retorna quantos deltas foram somados
+    (0 se outro processo está somando agora).
+    """
+    folded = db.execute(text("SELECT denuncia_clusters_fold(:limit)"), {"limit": limit}).scalar()
+    db.commit()
+    return folded or 0
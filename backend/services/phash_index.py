@@ -0,0 +1,136 @@
+# services/phash_index.py
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database.models import Denuncia
+from services.geo import haversine_m
+
+# Distância de Hamming máxima (de 64 bits) para considerar duas imagens a mesma cena
+PHASH_MAX_DISTANCE = int(os.getenv("PHASH_MAX_DISTANCE", "6"))
+
+# Raio (metros) em que uma quase-duplicata é considerada a mesma ocorrência
+NEAR_DUPLICATE_RADIUS_M = float(os.getenv("NEAR_DUPLICATE_RADIUS_M", "300"))
+
+
+# Folga na carga incremental: transações longas gravam updated_at com a hora de início
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """
+    🌳 BK-tree sobre distância de Hamming
+
+    Cada nó guarda um hash e os filhos indexados pela distância até ele.
+    Pela desigualdade triangular, uma busca com raio r só desce nos filhos
+    com distância em [d - r, d + r], descartando a maior parte da árvore.
+    """
+
+    def __init__(self):
+        self._root = None  # [hash, payloads, {distância: nó}]
+        self.size = 0
+
+    def add(self, value: int, payload):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [payload], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(payload)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [payload], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, object]]:
+        """Todos os (distância, payload) com distância <= max_distance"""
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                results.extend((distance, payload) for payload in node[1])
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+
+class NearDuplicateIndex:
+    """
+    🔁 Índice em memória de hashes perceptuais das denúncias já analisadas
+
+    Reconstruído do banco na subida do worker e atualizado de forma
+    incremental, para enxergar também o que outros workers validaram.
+    Só entram denúncias com saída do Vision guardada, que pode ser
+    reaproveitada pela quase-duplicata.
+    """
+
+    def __init__(self, max_distance: int = PHASH_MAX_DISTANCE, radius_m: float = NEAR_DUPLICATE_RADIUS_M):
+        self.max_distance = max_distance
+        self.radius_m = radius_m
+
+        self._tree = BKTree()
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._loaded_until: Optional[datetime] = None
+
+    def add(self, denuncia_id: int, phash: str, latitude: float, longitude: float):
+        with self._lock:
+            if denuncia_id in self._ids:
+                return
+            self._ids.add(denuncia_id)
+            self._tree.add(int(phash, 16), (denuncia_id, latitude, longitude))
+
+    def find(self, phash: str, latitude: float, longitude: float,
+             exclude_id: Optional[int] = None) -> Optional[Dict]:
+        """Quase-duplicata mais parecida (e, no empate, mais próxima) dentro do raio"""
+        with self._lock:
+            candidates = self._tree.search(int(phash, 16), self.max_distance)
+
+        best = None
+        for distance, (denuncia_id, lat, lng) in candidates:
+            if denuncia_id == exclude_id:
+                continue
+            meters = haversine_m(latitude, longitude, lat, lng)
+            if meters > self.radius_m:
+                continue
+            if best is None or (distance, meters) < (best["distance"], best["meters"]):
+                best = {"denuncia_id": denuncia_id, "distance": distance, "meters": round(meters, 1)}
+        return best
+
+    def refresh(self, db: Session) -> int:
+        """Carrega do banco as denúncias analisadas desde a última carga. Retorna quantas entraram"""
+        query = db.query(
+            Denuncia.id, Denuncia.image_phash, Denuncia.latitude, Denuncia.longitude,
+            Denuncia.updated_at
+        ).filter(
+            Denuncia.image_phash.isnot(None),
+            Denuncia.vision_results.isnot(None)
+        )
+        if self._loaded_until is not None:
+            query = query.filter(Denuncia.updated_at >= self._loaded_until - REFRESH_OVERLAP)
+
+        before = len(self._ids)
+        for row in query.yield_per(10000):
+            self.add(row.id, row.image_phash, row.latitude, row.longitude)
+            if row.updated_at and (self._loaded_until is None or row.updated_at > self._loaded_until):
+                self._loaded_until = row.updated_at
+        return len(self._ids) - before
+
+    def stats(self) -> Dict:
+        return {"size": len(self._ids), "max_distance": self.max_distance, "radius_m": self.radius_m}
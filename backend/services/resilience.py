@@ -0,0 +1,381 @@
+# services/resilience.py
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Optional
+
+
+class UpstreamUnavailableError(Exception):
+    """
+    Chamada recusada ou abortada pela camada de resiliência
+
+    `retry_after` só é preenchido quando a chamada foi recusada antes de
+    chegar ao upstream (circuito aberto ou limite de concorrência): são os
+    segundos até valer a pena tentar de novo.
+    """
+
+    def __init__(self, upstream: str, reason: str, retry_after: Optional[float] = None):
+        self.upstream = upstream
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"{upstream} indisponível: {reason}")
+
+
+try:
+    from google.api_core import exceptions as _api_exceptions
+except ImportError:
+    _api_exceptions = None
+
+# Códigos gRPC que indicam problema do serviço, não da requisição
+_RPC_FAILURE_CODES = {"UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "UNKNOWN", "RESOURCE_EXHAUSTED"}
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    A falha é do upstream (rede, prazo, 5xx/indisponível)?
+
+    Só essas contam no disjuntor e no limite adaptativo. Erros da própria
+    requisição (imagem corrompida ou em formato não suportado, argumento
+    inválido, conteúdo bloqueado) voltam para quem chamou sem contar.
+    """
+    if isinstance(error, (UpstreamUnavailableError, asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+
+    if _api_exceptions is not None:
+        if isinstance(error, (_api_exceptions.ServerError, _api_exceptions.RetryError)):
+            return True
+        if isinstance(error, _api_exceptions.GoogleAPICallError):
+            return False
+
+    # Clientes HTTP: status no atributo `code`; gRPC: método code() com o StatusCode
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            return getattr(code(), "name", None) in _RPC_FAILURE_CODES
+        except Exception:
+            return False
+    if isinstance(code, int) and 100 <= code < 600:
+        return code >= 500
+
+    # Erros de transporte de bibliotecas que não herdam de ConnectionError
+    return any(cls.__name__ in ("ConnectionError", "TransportError", "ConnectTimeout", "ReadTimeout")
+               for cls in type(error).__mro__ if cls.__module__ != "builtins")
+
+
+class CircuitBreaker:
+    """
+    🔌 Disjuntor por upstream
+
+    closed    -> chamadas passam; N falhas seguidas abrem o circuito
+    open      -> chamadas recusadas até `reset_timeout` segundos
+    half_open -> uma chamada de teste; sucesso fecha, falha reabre
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            logging.warning(f"🔌 Circuito '{self.name}': {self.state} -> {state}")
+            self.state = state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._set_state("half_open")
+
+            # half_open: só uma chamada de teste por vez
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def retry_after(self) -> float:
+        """Segundos até o circuito aceitar uma chamada de teste"""
+        with self._lock:
+            if self.state == "open":
+                return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            if self.state == "half_open":
+                return self.reset_timeout  # Chamada de teste em andamento
+            return 0.0
+
+    def release_probe(self):
+        """Devolve a vaga de teste sem contar sucesso nem falha"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+            self._set_state("closed")
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state("open")
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.state != "closed" else 0
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    📈 Limite de concorrência AIMD (aumento aditivo, redução multiplicativa)
+
+    Cada sucesso soma 1/limite (≈ +1 por "janela" de chamadas); cada falha
+    ou estouro de prazo multiplica o limite por `backoff_ratio`. Acima do
+    limite, chamadas são recusadas na hora em vez de enfileirar.
+    """
+
+    def __init__(self, initial: int = 10, minimum: int = 1, maximum: int = 64,
+                 backoff_ratio: float = 0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff_ratio = backoff_ratio
+
+        self.inflight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.inflight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.inflight += 1
+            return True
+
+    def release(self, success: Optional[bool]):
+        """success=None devolve a vaga sem mexer no limite"""
+        with self._lock:
+            self.inflight -= 1
+            if success is None:
+                return
+            if success:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit * self.backoff_ratio)
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": int(self.limit),
+            "inflight": self.inflight,
+            "rejected": self.rejected
+        }
+
+
+class Upstream:
+    """
+    🛡️ Política de resiliência de um serviço externo
+
+    Junta disjuntor, limite adaptativo, prazo por chamada e (no caminho
+    assíncrono) tentativas em paralelo ("hedging"): se a primeira tentativa
+    não responde em `hedge_delay` segundos, uma segunda é disparada e vale
+    a que terminar primeiro.
+    """
+
+    def __init__(self, name: str, deadline: float, hedge_delay: Optional[float] = None,
+                 max_attempts: int = 2, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 initial_limit: int = 10, max_limit: int = 64):
+        self.name = name
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.max_attempts = max_attempts
+
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self.limiter = AdaptiveConcurrencyLimiter(initial=initial_limit, maximum=max_limit)
+
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.hedges = 0
+        self.request_errors = 0
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _admit(self):
+        if not self.breaker.allow():
+            raise UpstreamUnavailableError(self.name, "circuito aberto", retry_after=self.breaker.retry_after())
+        if not self.limiter.try_acquire():
+            self.breaker.release_probe()
+            raise UpstreamUnavailableError(self.name, "limite de concorrência atingido", retry_after=1.0)
+        self.calls += 1
+
+    def _finish(self, success: bool, timed_out: bool = False):
+        self.limiter.release(success)
+        if success:
+            self.breaker.record_success()
+        else:
+            self.failures += 1
+            self.timeouts += int(timed_out)
+            self.breaker.record_failure()
+
+    def _finish_error(self, error: BaseException):
+        if is_upstream_failure(error):
+            self._finish(False)
+            return
+        # Erro da requisição: o upstream respondeu, então não conta como falha
+        self.request_errors += 1
+        self.limiter.release(None)
+        self.breaker.release_probe()
+
+    # --- Caminho assíncrono ---
+
+    async def _attempts(self, factory: Callable, hedge: bool = True):
+        loop = asyncio.get_running_loop()
+        tasks = {loop.create_task(factory())}
+        started = 1
+        last_error = None
+
+        try:
+            while tasks:
+                can_hedge = hedge and self.hedge_delay is not None and started < self.max_attempts
+                done, tasks = await asyncio.wait(
+                    tasks,
+                    timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    # Reenviar não conserta uma requisição inválida
+                    if not is_upstream_failure(last_error):
+                        raise last_error
+
+                # Sem resposta a tempo ou tentativa falhou: disparar outra
+                if started < self.max_attempts and (not done or not tasks):
+                    if not done:
+                        self.hedges += 1
+                    tasks.add(loop.create_task(factory()))
+                    started += 1
+
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, factory: Callable, hedge: bool = True):
+        """
+        Executa `factory()` (que retorna uma corrotina) com todas as proteções.
+        Levanta UpstreamUnavailableError se recusada ou se o prazo estourar.
+
+        hedge=False desliga as tentativas em paralelo (uma nova tentativa só
+        depois de uma falha), para chamadas que não devem ser duplicadas.
+        """
+        self._admit()
+        try:
+            result = await asyncio.wait_for(self._attempts(factory, hedge), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self._finish(False, timed_out=True)
+            raise UpstreamUnavailableError(self.name, f"prazo de {self.deadline}s esgotado")
+        except Exception as e:
+            self._finish_error(e)
+            raise
+
+        self._finish(True)
+        return result
+
+    # --- Caminho síncrono ---
+
+    def call_sync(self, fn: Callable, *args, **kwargs):
+        """
+        Executa `fn` numa thread com prazo. Se o prazo estoura, a chamada
+        segue rodando, mas a vaga só é devolvida quando ela termina de fato,
+        para que o limite reflita o trabalho real no upstream.
+        """
+        self._admit()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.limiter.maximum, thread_name_prefix=self.name)
+
+        future = self._executor.submit(fn, *args, **kwargs)
+        try:
+            result = future.result(timeout=self.deadline)
+        except FutureTimeoutError:
+            self.failures += 1
+            self.timeouts += 1
+            self.breaker.record_failure()
+            future.add_done_callback(lambda _: self.limiter.release(False))
+            raise UpstreamUnavailableError(self.name, f"prazo de {self.deadline}s esgotado")
+        except Exception as e:
+            self._finish_error(e)
+            raise
+
+        self._finish(True)
+        return result
+
+    def snapshot(self) -> Dict:
+        return {
+            "name": self.name,
+            "deadline_seconds": self.deadline,
+            "hedge_delay_seconds": self.hedge_delay,
+            "circuit": self.breaker.snapshot(),
+            "concurrency": self.limiter.snapshot(),
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "hedges": self.hedges,
+            "request_errors": self.request_errors
+        }
+
+
+def _env_float(name: str, default: str) -> float:
+    return float(os.getenv(name, default))
+
+
+_upstreams: Dict[str, Upstream] = {}
+_upstreams_lock = threading.Lock()
+
+
+def get_upstream(name: str) -> Upstream:
+    """
+    Upstream compartilhado do processo, configurado por variáveis de ambiente
+    (ex.: VISION_DEADLINE_SECONDS, GEMINI_FAILURE_THRESHOLD)
+    """
+    with _upstreams_lock:
+        if name not in _upstreams:
+            prefix = name.upper()
+            hedge_delay = os.getenv(f"{prefix}_HEDGE_DELAY_SECONDS")
+            _upstreams[name] = Upstream(
+                name,
+                deadline=_env_float(f"{prefix}_DEADLINE_SECONDS", "15"),
+                hedge_delay=float(hedge_delay) if hedge_delay else None,
+                max_attempts=int(os.getenv(f"{prefix}_MAX_ATTEMPTS", "2")),
+                failure_threshold=int(os.getenv(f"{prefix}_FAILURE_THRESHOLD", "5")),
+                reset_timeout=_env_float(f"{prefix}_RESET_TIMEOUT_SECONDS", "30"),
+                initial_limit=int(os.getenv(f"{prefix}_INITIAL_CONCURRENCY", "10")),
+                max_limit=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", "64"))
+            )
+        return _upstreams[name]
+
+
+def upstreams_snapshot() -> Dict:
+    """📊 Estado de todos os upstreams deste processo"""
+    with _upstreams_lock:
+        return {name: upstream.snapshot() for name, upstream in _upstreams.items()}
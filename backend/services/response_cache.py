@@ -0,0 +1,229 @@
+# services/response_cache.py
+import os
+import time
+import select
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Respostas mantidas em memória por processo da API
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+# Soma máxima dos corpos em cache por processo (bytes): uma página de
+# listagem pode ter centenas de KB, e as chaves (cursor, filtros, bbox,
+# busca) são praticamente ilimitadas
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Validade máxima de uma resposta, mesmo sem invalidação (segundos)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "60"))
+
+# Canal do LISTEN/NOTIFY que avisa mudanças em denúncias
+DENUNCIAS_CHANNEL = "denuncias_changed"
+
+# Escopo invalidado por qualquer mudança (listagens)
+LISTS_SCOPE = "lists"
+
+
+class ResponseCache:
+    """
+    🗂️ Cache de respostas prontas (JSON) das leituras de denúncias
+
+    LRU limitado em entradas e em bytes + TTL, invalidado por versão:
+
+    - cada invalidação incrementa `version` e marca os escopos afetados
+      (as listagens e o id de cada denúncia alterada);
+    - quem vai montar uma resposta pega `snapshot()` ANTES de consultar o
+      banco e grava com essa versão; uma entrada só vale se for mais nova
+      que a última invalidação do seu escopo.
+
+    Assim uma consulta que leu o banco antes de um commit concorrente
+    nunca fica no cache depois da invalidação correspondente.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl_seconds: float = RESPONSE_CACHE_TTL,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.configured = max_entries > 0 and ttl_seconds > 0 and max_bytes > 0
+        self.enabled = self.configured
+
+        # Chave -> (valor, versão, expira em, tamanho do corpo)
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._bytes = 0
+        # Escopo -> versão da última invalidação (limitado como as entradas)
+        self._stamps: "OrderedDict[object, int]" = OrderedDict()
+        self._floor = 0  # Invalidação mínima para escopos esquecidos
+        self._version = 0
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.too_large = 0
+
+    def snapshot(self) -> int:
+        return self._version
+
+    def _stamp(self, scope) -> int:
+        return max(self._floor, self._stamps.get(scope, 0))
+
+    def get(self, key: Tuple, scope) -> Optional[tuple]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, version, expires_at, _ = entry
+                if expires_at >= time.monotonic() and version >= self._stamp(scope):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def _remove(self, key: Tuple):
+        self._bytes -= self._entries.pop(key)[3]
+
+    def set(self, key: Tuple, scope, value: tuple, version: int):
+        """`value` = (corpo em bytes, headers)"""
+        if not self.enabled:
+            return
+        size = len(value[0])
+        with self._lock:
+            if version < self._stamp(scope):
+                return  # Lido antes de uma invalidação: já nasce velho
+            if size > self.max_bytes:
+                self.too_large += 1
+                return  # Sozinha já estouraria o orçamento
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, version, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, denuncia_ids: Iterable[int] = ()):
+        """Invalida as listagens e as denúncias indicadas"""
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            for scope in (LISTS_SCOPE, *denuncia_ids):
+                self._stamps[scope] = self._version
+                self._stamps.move_to_end(scope)
+            while len(self._stamps) > self.max_entries:
+                _, stamp = self._stamps.popitem(last=False)
+                self._floor = max(self._floor, stamp)
+
+    def invalidate_all(self):
+        with self._lock:
+            self._version += 1
+            self.invalidations += 1
+            self._floor = self._version
+            self._stamps.clear()
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "too_large": self.too_large,
+            "ttl_seconds": self.ttl_seconds,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
+
+
+def notify_denuncias_changed(db: Session, denuncia_ids: Optional[Iterable[int]] = None):
+    """
+    📣 Avisa os processos da API que denúncias mudaram (sem commit)
+
+    O NOTIFY é transacional: só é entregue se o commit acontecer. Sem ids,
+    todos os caches descartam tudo (ex.: re-score em massa).
+    """
+    payload = "*" if denuncia_ids is None else ",".join(str(i) for i in denuncia_ids)
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": DENUNCIAS_CHANNEL, "payload": payload})
+
+
+def _apply_payload(cache: ResponseCache, payload: str):
+    if payload == "*":
+        cache.invalidate_all()
+    else:
+        cache.invalidate(int(i) for i in payload.split(",") if i)
+
+
+class InvalidationListener:
+    """
+    👂 Thread que escuta o canal de mudanças e invalida o cache local
+
+    Usa uma conexão dedicada (fora do pool) em autocommit. Enquanto a
+    conexão está caída o cache fica desligado (`cache.enabled = False`),
+    porque avisos perdidos deixariam respostas velhas até o TTL.
+    """
+
+    def __init__(self, cache: ResponseCache, engine, reconnect_delay: float = 5.0):
+        self.cache = cache
+        self.engine = engine
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="response-cache-listener", daemon=True)
+
+    def start(self):
+        # Só passa a cachear depois do LISTEN estar ativo
+        self.cache.enabled = False
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            raw = None
+            try:
+                raw = self.engine.raw_connection()
+                raw.detach()  # Conexão própria: não volta ao pool com LISTEN ativo
+                # Depois do detach, driver_connection é None: a conexão psycopg2
+                # continua acessível só por dbapi_connection
+                conn = raw.dbapi_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {DENUNCIAS_CHANNEL}")
+
+                # Avisos perdidos enquanto desconectado: começar do zero
+                self.cache.invalidate_all()
+                self.cache.enabled = self.cache.configured
+                self.connected = True
+                print(f"👂 Cache de respostas escutando '{DENUNCIAS_CHANNEL}'")
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        _apply_payload(self.cache, conn.notifies.pop(0).payload)
+            except Exception as e:
+                logging.error(f"Listener do cache de respostas caiu ({e}), cache desligado")
+            finally:
+                self.connected = False
+                self.cache.enabled = False
+                if raw is not None:
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+            self._stop.wait(self.reconnect_delay)
@@ -0,0 +1,170 @@
+# services/scoring_rules.py
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from services.keyword_matcher import KeywordMatcher
+
+# Arquivo de regras da validação AI (palavras-chave, pesos e features do Vision)
+VALIDATION_RULES_PATH = os.getenv(
+    "VALIDATION_RULES_PATH",
+    str(Path(__file__).parent / "rules" / "validation_rules.json")
+)
+
+# Intervalo mínimo entre verificações de mudança no arquivo (segundos)
+VALIDATION_RULES_CHECK_INTERVAL = float(os.getenv("VALIDATION_RULES_CHECK_INTERVAL", "2"))
+
+KEYWORD_LISTS = [
+    "spam_indicators", "non_environmental_labels", "environmental_context_labels",
+    "irrelevant_indicators", "environmental_labels", "water_pollution_labels",
+    "outdoor_context_labels", "coastal_words"
+]
+
+SCORING_WEIGHTS = [
+    "irrelevant_penalty", "environmental_points_per_label", "environmental_bonus_max",
+    "water_pollution_bonus", "no_context_penalty", "unsafe_content_penalty",
+    "base_score", "approval_threshold", "irrelevant_score_cap", "min_valid_score"
+]
+
+
+class InvalidRulesError(Exception):
+    """Arquivo de regras malformado ou incompleto"""
+
+
+class CompiledRules:
+    """
+    📜 Uma versão das regras de pontuação, já compilada
+
+    Os autômatos de busca e os conjuntos são montados uma vez no
+    carregamento. O objeto não muda depois de criado: uma validação que
+    pegou esta versão usa as mesmas regras do começo ao fim, mesmo que
+    o arquivo seja recarregado no meio do caminho.
+    """
+
+    def __init__(self, data: Dict):
+        missing = [key for key in ["version", "category_expected_objects", "scoring", "default_vision_features"] + KEYWORD_LISTS
+                   if key not in data]
+        if missing:
+            raise InvalidRulesError(f"Chaves ausentes: {missing}")
+
+        missing_weights = [key for key in SCORING_WEIGHTS if key not in data["scoring"]]
+        if missing_weights:
+            raise InvalidRulesError(f"Pesos ausentes em 'scoring': {missing_weights}")
+
+        self.version = str(data["version"])
+
+        # Mapeamento categoria -> objetos esperados na imagem
+        self.category_expected_objects: Dict[str, List[str]] = {
+            category: list(expected) for category, expected in data["category_expected_objects"].items()
+        }
+
+        # Listas de palavras-chave (ver validation_rules.json)
+        for key in KEYWORD_LISTS:
+            setattr(self, key, list(data[key]))
+
+        # ⚖️ Pesos e limites da decisão final
+        self.scoring: Dict[str, int] = {key: data["scoring"][key] for key in SCORING_WEIGHTS}
+
+        # Features pedidas por categoria (categorias ausentes usam o padrão)
+        self.default_vision_features: List[str] = list(data["default_vision_features"])
+        self.category_vision_features: Dict[str, List[str]] = {
+            category: list(features) for category, features in data.get("category_vision_features", {}).items()
+        }
+
+        self._compile()
+
+    def _compile(self):
+        """Monta uma vez os autômatos de busca de todas as listas de palavras-chave"""
+        label_keywords = [
+            keyword
+            for expected in self.category_expected_objects.values()
+            for keyword in expected
+        ]
+        label_keywords += self.irrelevant_indicators + self.environmental_labels
+        label_keywords += self.water_pollution_labels + self.outdoor_context_labels
+
+        self.label_matcher = KeywordMatcher(label_keywords)
+        self.spam_matcher = KeywordMatcher(self.spam_indicators)
+        self.coastal_matcher = KeywordMatcher(self.coastal_words)
+
+        self.irrelevant_set = frozenset(self.irrelevant_indicators)
+        self.environmental_set = frozenset(self.environmental_labels)
+        self.water_set = frozenset(self.water_pollution_labels)
+        self.outdoor_set = frozenset(self.outdoor_context_labels)
+        self.non_environmental_set = frozenset(self.non_environmental_labels)
+        self.environmental_context_set = frozenset(self.environmental_context_labels)
+
+    def match_labels(self, labels: List[str]) -> List[frozenset]:
+        """Palavras-chave contidas em cada label (uma passada por label)"""
+        return self.label_matcher.match_labels(labels)
+
+    def vision_features(self, category: str) -> List[str]:
+        return self.category_vision_features.get(category, self.default_vision_features)
+
+
+def load_rules(path: str = VALIDATION_RULES_PATH) -> CompiledRules:
+    with open(path, "r", encoding="utf-8") as f:
+        return CompiledRules(json.load(f))
+
+
+class RulesManager:
+    """
+    🔄 Mantém a versão atual das regras e recarrega quando o arquivo muda
+
+    `current()` verifica a data de modificação no máximo a cada
+    `check_interval` segundos. A nova versão é compilada por inteiro e só
+    então substitui a anterior (troca de uma referência). Um arquivo
+    inválido é ignorado e a versão anterior continua valendo.
+    """
+
+    def __init__(self, path: str = VALIDATION_RULES_PATH, check_interval: float = VALIDATION_RULES_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+
+        # Na subida, um arquivo inválido é erro fatal
+        self._rules = load_rules(path)
+        self._stamp = self._file_stamp()
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        print(f"📜 Regras de validação carregadas (versão {self._rules.version})")
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> CompiledRules:
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self._reload_if_changed()
+        return self._rules
+
+    def _reload_if_changed(self):
+        # Só uma thread verifica/recarrega; as outras seguem com a versão atual
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_check = time.monotonic()
+            try:
+                stamp = self._file_stamp()
+            except OSError as e:
+                logging.error(f"Arquivo de regras inacessível ({e}), mantendo versão {self._rules.version}")
+                return
+            if stamp == self._stamp:
+                return
+
+            try:
+                rules = load_rules(self.path)
+            except Exception as e:
+                logging.error(f"Regras inválidas em {self.path} ({e}), mantendo versão {self._rules.version}")
+                self._stamp = stamp  # Não tentar de novo até o arquivo mudar
+                return
+
+            previous = self._rules.version
+            self._rules = rules
+            self._stamp = stamp
+            print(f"🔄 Regras de validação recarregadas: {previous} -> {rules.version}")
+        finally:
+            self._lock.release()
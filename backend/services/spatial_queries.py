@@ -0,0 +1,80 @@
+# services/spatial_queries.py
+import math
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from database.models import Denuncia
+from services.geo import geohash_cover, haversine_m, METERS_PER_DEGREE
+
+# Limites das consultas espaciais
+MAX_SPATIAL_RESULTS = 2000
+MAX_RADIUS_M = 50000
+
+
+def _geohash_ranges(min_lat: float, min_lng: float, max_lat: float, max_lng: float):
+    """Condição "geohash começa com algum dos prefixos" como intervalos do índice"""
+    return or_(*[
+        and_(Denuncia.geohash >= prefix, Denuncia.geohash < prefix + "{")  # "{" vem logo depois de "z"
+        for prefix in geohash_cover(min_lat, min_lng, max_lat, max_lng)
+    ])
+
+
+def denuncias_in_bbox(db: Session, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                      limit: int, category: Optional[str] = None) -> List[Denuncia]:
+    """
+    🗺️ Denúncias dentro do retângulo visível do mapa, mais recentes primeiro
+
+    O índice de geohash reduz a busca às células que cobrem o retângulo;
+    a comparação exata de latitude/longitude descarta as bordas.
+    """
+    query = db.query(Denuncia).filter(
+        _geohash_ranges(min_lat, min_lng, max_lat, max_lng),
+        Denuncia.latitude.between(min_lat, max_lat),
+        Denuncia.longitude.between(min_lng, max_lng)
+    )
+    if category:
+        query = query.filter(Denuncia.category == category)
+
+    return query.order_by(Denuncia.created_at.desc(), Denuncia.id.desc()).limit(limit).all()
+
+
+def denuncias_nearby(db: Session, latitude: float, longitude: float, radius_m: float,
+                     limit: int, category: Optional[str] = None) -> List[Tuple[Denuncia, float]]:
+    """
+    📍 Denúncias a até `radius_m` metros, da mais próxima para a mais distante
+
+    O banco ordena por uma distância plana aproximada (válida para raios de
+    poucos km) e a distância exata é calculada só para as linhas retornadas.
+
+    Returns:
+        lista de (denúncia, distância em metros)
+    """
+    dlat = radius_m / METERS_PER_DEGREE
+    cos_lat = max(0.01, math.cos(math.radians(latitude)))
+    dlng = dlat / cos_lat
+
+    # Distância ao quadrado em "graus de latitude"
+    distance2 = (
+        (Denuncia.latitude - latitude) * (Denuncia.latitude - latitude) +
+        (Denuncia.longitude - longitude) * (Denuncia.longitude - longitude) * (cos_lat * cos_lat)
+    )
+
+    query = db.query(Denuncia).filter(
+        _geohash_ranges(latitude - dlat, longitude - dlng, latitude + dlat, longitude + dlng),
+        Denuncia.latitude.between(latitude - dlat, latitude + dlat),
+        Denuncia.longitude.between(longitude - dlng, longitude + dlng),
+        distance2 <= dlat * dlat
+    )
+    if category:
+        query = query.filter(Denuncia.category == category)
+
+    rows = query.order_by(distance2, Denuncia.id).limit(limit).all()
+
+    results = []
+    for denuncia in rows:
+        distance = haversine_m(latitude, longitude, denuncia.latitude, denuncia.longitude)
+        if distance <= radius_m:
+            results.append((denuncia, round(distance, 1)))
+    return results
@@ -0,0 +1,248 @@
+# services/text_analysis.py
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Palavras frequentes que não dizem nada sobre a imagem
+STOPWORDS_PT = frozenset({
+    "para", "como", "esta", "este", "estas", "estes", "isso", "isto", "essa", "esse",
+    "essas", "esses", "aquela", "aquele", "muito", "muita", "muitos", "muitas", "mais",
+    "menos", "pela", "pelo", "pelas", "pelos", "aqui", "onde", "quando", "sobre", "entre",
+    "tambem", "ainda", "estao", "sendo", "foram", "todo", "toda", "todos", "todas",
+    "minha", "meu", "nossa", "nosso", "perto", "hoje", "ontem", "depois", "antes",
+    "desde", "cada", "outro", "outra", "mesmo", "mesma", "sempre", "nunca", "porque",
+    "pois", "tem", "temos", "tinha", "estava", "fica", "ficou", "local", "lugar"
+})
+
+# 📖 Português -> inglês (vocabulário das labels do Vision).
+# As chaves passam pelo mesmo stemmer das descrições; os valores, pelo stemmer inglês.
+LEXICON_PT_EN = {
+    "lixo": ["trash", "garbage", "waste", "litter"],
+    "entulho": ["debris", "waste"],
+    "residuo": ["waste", "debris"],
+    "plastico": ["plastic"],
+    "garrafa": ["bottle"],
+    "sacola": ["bag"],
+    "saco": ["bag"],
+    "lata": ["can"],
+    "oleo": ["oil"],
+    "petroleo": ["oil"],
+    "mancha": ["spill", "stain"],
+    "vazamento": ["spill", "leak"],
+    "derramamento": ["spill"],
+    "esgoto": ["sewage", "pipe"],
+    "cano": ["pipe"],
+    "tubulacao": ["pipe"],
+    "tambor": ["barrel"],
+    "barril": ["barrel"],
+    "quimico": ["chemical"],
+    "poluicao": ["pollution"],
+    "poluido": ["pollution"],
+    "sujeira": ["dirt", "waste"],
+    "agua": ["water"],
+    "mar": ["sea", "ocean"],
+    "oceano": ["ocean"],
+    "rio": ["river"],
+    "praia": ["beach", "shore"],
+    "costa": ["coast"],
+    "litoral": ["coast"],
+    "areia": ["sand"],
+    "duna": ["dune"],
+    "falesia": ["cliff"],
+    "onda": ["wave"],
+    "erosao": ["erosion"],
+    "desmoronamento": ["collapse"],
+    "arvore": ["tree"],
+    "floresta": ["forest"],
+    "mata": ["forest", "vegetation"],
+    "mangue": ["mangrove"],
+    "manguezal": ["mangrove"],
+    "vegetacao": ["vegetation"],
+    "desmatamento": ["deforestation", "logging"],
+    "madeira": ["wood"],
+    "tronco": ["wood", "stump"],
+    "toco": ["stump"],
+    "motosserra": ["chainsaw"],
+    "tartaruga": ["turtle"],
+    "peixe": ["fish"],
+    "animal": ["animal"],
+    "morto": ["dead"],
+    "golfinho": ["dolphin"],
+    "baleia": ["whale"],
+    "ave": ["bird"],
+    "passaro": ["bird"],
+    "caranguejo": ["crab"],
+    "rede": ["net"],
+    "pesca": ["fishing"],
+    "coral": ["coral", "reef"],
+    "recife": ["reef"],
+    "alga": ["algae", "seaweed"],
+    "barulho": ["noise", "loud"],
+    "som": ["sound"],
+    "barco": ["boat"],
+    "lancha": ["boat"],
+    "navio": ["ship"],
+    "motor": ["motor", "engine"],
+    "construcao": ["construction", "building"],
+    "obra": ["construction"],
+    "predio": ["building"],
+    "casa": ["house"],
+    "muro": ["wall", "structure"],
+    "concreto": ["concrete"],
+    "cimento": ["concrete"],
+    "pier": ["pier"],
+    "mineracao": ["mining"],
+    "escavacao": ["excavation"],
+    "draga": ["dredging"],
+    "caminhao": ["truck"],
+    "maquina": ["machinery", "equipment"],
+    "turista": ["tourist"],
+    "carro": ["car", "vehicle"],
+    "veiculo": ["vehicle"],
+    "moto": ["motorcycle"],
+    "quadriciclo": ["atv"],
+    "fogo": ["fire"],
+    "fogueira": ["fire"],
+    "barraca": ["tent"],
+    "acampamento": ["camping", "tent"],
+    "fumaca": ["smoke"],
+}
+
+
+def fold_accents(text: str) -> str:
+    """
+    Minúsculas e sem acentos ("Poluição" -> "poluicao")
+
+    Caracteres sem equivalente ASCII são descartados (o tokenizador só
+    aproveita letras a-z e dígitos).
+    """
+    text = text.lower()
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold_accents(text))
+
+
+@lru_cache(maxsize=65536)
+def stem_pt(word: str) -> str:
+    """
+    🇧🇷 Stemmer leve de português (plural, gênero, diminutivo, advérbio)
+
+    Não tenta chegar ao radical linguístico: só junta flexões da mesma
+    palavra e deixa cognatos próximos do inglês ("plasticos" -> "plastic").
+    Espera a palavra já sem acentos.
+    """
+    if len(word) <= 3:
+        return word
+
+    # Plural
+    if word.endswith(("oes", "aes")):
+        word = word[:-3] + "ao"
+    elif word.endswith("ais") and len(word) > 4:
+        word = word[:-2] + "l"
+    elif word.endswith("eis") and len(word) > 4:
+        word = word[:-3] + "el"
+    elif word.endswith("ois"):
+        word = word[:-3] + "ol"
+    elif word.endswith("ns"):
+        word = word[:-2] + "m"
+    elif word.endswith(("res", "zes", "ses")) and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us")):
+        word = word[:-1]
+
+    # Advérbios e diminutivos
+    if word.endswith("mente") and len(word) > 7:
+        word = word[:-5]
+    elif word.endswith(("zinho", "zinha")) and len(word) > 7:
+        word = word[:-5]
+    elif word.endswith(("inho", "inha")) and len(word) > 6:
+        word = word[:-4]
+
+    # Vogal temática / gênero (morto, morta -> mort)
+    if len(word) > 4 and word[-1] in "aeo":
+        word = word[:-1]
+
+    return word
+
+
+@lru_cache(maxsize=65536)
+def stem_en(word: str) -> str:
+    """Stemmer mínimo de inglês para as labels do Vision (só plural)"""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _build_lexicon(lexicon: Dict[str, List[str]]) -> Dict[str, FrozenSet[str]]:
+    compiled: Dict[str, set] = {}
+    for portuguese, english in lexicon.items():
+        stems = {stem_en(token) for phrase in english for token in tokenize(phrase)}
+        compiled.setdefault(stem_pt(fold_accents(portuguese)), set()).update(stems)
+    return {stem: frozenset(stems) for stem, stems in compiled.items()}
+
+
+_LEXICON = _build_lexicon(LEXICON_PT_EN)
+
+
+@lru_cache(maxsize=65536)
+def expand_word(word: str) -> FrozenSet[str]:
+    """
+    Formas de uma palavra da descrição que podem aparecer na imagem:
+    radical em português (OCR), radical em inglês (quem escreve em inglês)
+    e as traduções do léxico
+    """
+    pt = stem_pt(word)
+    return frozenset({pt, stem_en(word)}) | _LEXICON.get(pt, frozenset())
+
+
+def image_tokens(labels: Iterable[str], text: str) -> FrozenSet[str]:
+    """
+    🔤 Conjunto de radicais do que o Vision viu: labels (inglês) e texto OCR
+    (normalmente português; entra com os dois stemmers)
+    """
+    tokens = {stem_en(token) for token in tokenize(" ".join(labels))}
+    for token in tokenize(text):
+        tokens.add(stem_pt(token))
+        tokens.add(stem_en(token))
+    return frozenset(tokens)
+
+
+def description_terms(description: str, min_length: int = 4) -> Counter:
+    """Palavras relevantes da descrição (sem acento, sem stopwords) com repetições"""
+    return Counter(
+        token for token in tokenize(description)
+        if len(token) >= min_length and token not in STOPWORDS_PT and not token.isdigit()
+    )
+
+
+def match_description(description: str, labels: Iterable[str], text: str):
+    """
+    Quantas palavras relevantes da descrição aparecem na imagem
+
+    Cada palavra vira um pequeno conjunto de formas (expand_word) e o
+    casamento é uma interseção com o conjunto de radicais da imagem.
+
+    Returns:
+        (palavras casadas, total de palavras relevantes)
+    """
+    terms = description_terms(description)
+    if not terms:
+        return 0, 0
+
+    seen = image_tokens(labels, text)
+    matches = sum(count for word, count in terms.items() if not expand_word(word).isdisjoint(seen))
+    return matches, sum(terms.values())
@@ -0,0 +1,93 @@
+# services/timing.py
+import time
+import bisect
+from contextlib import contextmanager
+from typing import Dict, Iterable, List
+
+# Limites superiores dos buckets dos histogramas (ms)
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+class SpanRecorder:
+    """
+    ⏱️ Mede a duração de cada etapa de uma validação
+
+        spans = SpanRecorder()
+        with spans.span("vision_call"):
+            ...
+        spans.as_dict()  # {"vision_call": 812.4, "total": ...}
+
+    Etapas repetidas acumulam o tempo.
+    """
+
+    def __init__(self):
+        self.timings_ms: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.timings_ms[name] = round(self.timings_ms.get(name, 0) + elapsed, 2)
+
+    def record(self, name: str, elapsed_ms: float):
+        self.timings_ms[name] = round(self.timings_ms.get(name, 0) + elapsed_ms, 2)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            **self.timings_ms,
+            "total": round((time.perf_counter() - self._started) * 1000, 2)
+        }
+
+
+class LatencyHistogram:
+    """📊 Histograma de latências com buckets fixos e percentis estimados"""
+
+    def __init__(self, buckets: List[float] = HISTOGRAM_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = acima do maior bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.sum += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, p: float) -> float:
+        """Limite superior do bucket onde cai o percentil p (0-100)"""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return float(self.buckets[i]) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict:
+        labels = [f"<={bucket}" for bucket in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count, 2) if self.count else 0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max, 2),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+def aggregate_timings(samples: Iterable[Dict[str, float]]) -> Dict[str, Dict]:
+    """Agrupa vários dicionários etapa -> ms em um histograma por etapa"""
+    histograms: Dict[str, LatencyHistogram] = {}
+    for sample in samples:
+        for stage, value in (sample or {}).items():
+            histograms.setdefault(stage, LatencyHistogram()).observe(value)
+    return {stage: histogram.to_dict() for stage, histogram in histograms.items()}
@@ -0,0 +1,88 @@
+# services/upload_service.py
+import os
+import uuid
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+# Tamanho dos blocos lidos/escritos por vez (1 MiB)
+CHUNK_SIZE = 1024 * 1024
+
+# Limite de tamanho por imagem (padrão: 15 MB)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "15")) * 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Upload excedeu o tamanho máximo permitido"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"Imagem excede o limite de {max_bytes // (1024 * 1024)} MB")
+
+
+def _extensao(filename: Optional[str]) -> str:
+    """Extrai a extensão do nome original (padrão: jpg)"""
+    if filename and "." in filename:
+        ext = filename.rsplit(".", 1)[-1].lower()
+        if ext.isalnum() and len(ext) <= 5:
+            return ext
+    return "jpg"
+
+
+def _copiar_com_hash(source, destino: Path, max_bytes: int) -> Dict:
+    """
+    Copia o arquivo em blocos calculando SHA-256 e tamanho.
+    Roda em thread separada para não bloquear o event loop.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+
+    try:
+        with open(destino, "wb") as buffer:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+
+                sha256.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        # Não deixar arquivo parcial no disco
+        destino.unlink(missing_ok=True)
+        raise
+
+    return {"sha256": sha256.hexdigest(), "size": size}
+
+
+async def ingest_upload(image: UploadFile, upload_dir: Path,
+                        max_bytes: int = MAX_UPLOAD_BYTES) -> Dict:
+    """
+    📥 Grava o upload em disco de forma streaming, fora do event loop
+
+    Returns:
+        dict: {
+            'path': str,
+            'filename': str,
+            'sha256': str,
+            'size': int
+        }
+    """
+    image_filename = f"{uuid.uuid4().hex}.{_extensao(image.filename)}"
+    image_path = upload_dir / image_filename
+
+    await image.seek(0)
+    resultado = await run_in_threadpool(_copiar_com_hash, image.file, image_path, max_bytes)
+
+    return {
+        "path": str(image_path),
+        "filename": image_filename,
+        "sha256": resultado["sha256"],
+        "size": resultado["size"],
+    }
@@ -0,0 +1,167 @@
+# services/validation_pipeline.py
+import time
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from database.connection import SessionLocal
+from database.models import Denuncia
+from services import validation_queue
+from services.timing import SpanRecorder
+from services.incidents import record_incident_verdict
+from services.response_cache import notify_denuncias_changed
+
+
+def _carregar_denuncia(denuncia_id: int) -> Optional[Dict]:
+    """Carrega os dados necessários para a validação"""
+    db = SessionLocal()
+    try:
+        denuncia = db.query(Denuncia).filter(Denuncia.id == denuncia_id).first()
+        if not denuncia:
+            return None
+
+        return {
+            "id": denuncia.id,
+            "image_path": denuncia.image_path,
+            "category": denuncia.category,
+            "description": denuncia.description,
+            "location": {
+                "latitude": denuncia.latitude,
+                "longitude": denuncia.longitude,
+                "address": denuncia.address or f"Lat: {denuncia.latitude}, Long: {denuncia.longitude}"
+            }
+        }
+    finally:
+        db.close()
+
+
+def _carregar_vision_results(denuncia_id: int) -> Optional[Dict]:
+    """Saída do Vision guardada de outra denúncia"""
+    db = SessionLocal()
+    try:
+        row = db.query(Denuncia.vision_results).filter(Denuncia.id == denuncia_id).first()
+        return row.vision_results if row else None
+    finally:
+        db.close()
+
+
+def _salvar_resultado(job: Dict, worker_id: str, validation_result: Optional[Dict],
+                      image_variants: Optional[Dict], spans: Optional[SpanRecorder] = None):
+    """
+    Grava o resultado na denúncia e conclui o job na mesma transação
+
+    Os tempos de gravação e commit só são conhecidos depois do commit,
+    então a série completa de tempos vai para o job num UPDATE separado.
+    """
+    spans = spans or SpanRecorder()
+    db = SessionLocal()
+    try:
+        write_started = time.perf_counter()
+        if not validation_queue.complete_job(db, job["id"], worker_id):
+            # Visibilidade expirou e outro worker assumiu o job
+            print(f"⚠️ Job {job['id']} não pertence mais a {worker_id}, resultado descartado")
+            db.rollback()
+            return
+
+        denuncia = db.query(Denuncia).filter(Denuncia.id == job["denuncia_id"]).first()
+        if denuncia and validation_result:
+            if image_variants:
+                denuncia.image_variants = {
+                    name: image_variants[name] for name in ("vision", "medium", "thumbnail")
+                }
+                denuncia.image_phash = image_variants.get("phash")
+            denuncia.is_ai_validated = True
+            denuncia.is_valid = validation_result["is_valid"]
+            denuncia.validation_score = validation_result["confidence_score"]
+            denuncia.validation_details = validation_result["details"]
+            denuncia.vision_results = validation_result.get("vision_results")
+            denuncia.status = "validated" if validation_result["is_valid"] else "rejected"
+            record_incident_verdict(db, denuncia)
+            notify_denuncias_changed(db, [denuncia.id])  # Entregue no commit
+
+        db.flush()
+        spans.record("db_write", (time.perf_counter() - write_started) * 1000)
+
+        with spans.span("db_commit"):
+            db.commit()
+
+        validation_queue.record_job_timings(db, job["id"], spans.as_dict())
+        db.commit()
+
+        if denuncia and validation_result:
+            print(f"✅ Validação AI concluída para denúncia {denuncia.id}:")
+            print(f"   🎯 Válida: {validation_result['is_valid']}")
+            print(f"   📊 Score: {validation_result['confidence_score']}/100")
+            print(f"   📋 Status: {denuncia.status}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def _buscar_quase_duplicata(near_duplicates, dados: Dict, phash: str) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Quase-duplicata já analisada na mesma área e a saída do Vision dela"""
+    match = near_duplicates.find(
+        phash, dados["location"]["latitude"], dados["location"]["longitude"], exclude_id=dados["id"]
+    )
+    if not match:
+        return None, None
+
+    vision_results = await asyncio.to_thread(_carregar_vision_results, match["denuncia_id"])
+    if not vision_results:
+        return None, None
+    return match, vision_results
+
+
+async def run_validation_job(job: Dict, validator, image_processor, worker_id: str,
+                             near_duplicates=None):
+    """
+    🤖 Executa a validação AI de um job da fila
+
+    Normaliza a imagem, valida com o SmartDenunciaValidator e grava o resultado.
+    Se `near_duplicates` (NearDuplicateIndex) encontra a mesma cena já analisada
+    por perto, a saída do Vision dela é reaproveitada e o Vision não é chamado.
+    Exceções sobem para o worker, que decide entre retry e falha definitiva.
+    """
+    dados = await asyncio.to_thread(_carregar_denuncia, job["denuncia_id"])
+
+    if not dados or not dados["image_path"]:
+        # Denúncia removida ou sem imagem: nada a validar
+        await asyncio.to_thread(_salvar_resultado, job, worker_id, None, None)
+        return
+
+    print(f"🔄 Iniciando validação AI para denúncia {dados['id']} "
+          f"(tentativa {job['attempts']}, prioridade {job.get('priority', 0)})")
+
+    # ⏱️ Tempo de cada etapa: vai para validation_details e para o job
+    spans = SpanRecorder()
+
+    # 🖼️ Normalizar imagem e gerar variantes (pool de processos)
+    with spans.span("image_normalize"):
+        image_variants = await image_processor.process(dados["image_path"])
+    vision_image_path = image_variants["vision"] if image_variants else dados["image_path"]
+    phash = image_variants.get("phash") if image_variants else None
+
+    # 🔁 Mesma cena já analisada na mesma área?
+    match, vision_results = None, None
+    if phash and near_duplicates is not None:
+        with spans.span("near_duplicate_lookup"):
+            match, vision_results = await _buscar_quase_duplicata(near_duplicates, dados, phash)
+        if match:
+            print(f"🔁 Denúncia {dados['id']} é quase-duplicata da {match['denuncia_id']} "
+                  f"(distância {match['distance']}, {match['meters']}m): Vision reaproveitado")
+
+    validation_result = await validator.validate_denuncia_complete(
+        vision_image_path, dados["category"], dados["description"], dados["location"], spans,
+        vision_results=vision_results
+    )
+
+    if match:
+        validation_result["details"]["near_duplicate_of"] = match["denuncia_id"]
+        validation_result["details"]["phash_distance"] = match["distance"]
+
+    await asyncio.to_thread(_salvar_resultado, job, worker_id, validation_result, image_variants, spans)
+
+    # Disponível para as próximas denúncias deste worker
+    if phash and near_duplicates is not None and validation_result.get("vision_results"):
+        near_duplicates.add(dados["id"], phash, dados["location"]["latitude"], dados["location"]["longitude"])
@@ -0,0 +1,55 @@
+# services/validation_priority.py
+import os
+
+from database.models import Denuncia
+from services.geo import is_coastal_area
+
+# Segundos de espera que valem 1 ponto de prioridade (envelhecimento).
+# Com 180s, a prioridade máxima (60) vale 3 horas de fila: um job de prioridade 0
+# só passa à frente de um de prioridade 60 criado até 3 horas depois dele.
+PRIORITY_AGING_SECONDS = float(os.getenv("VALIDATION_PRIORITY_AGING_SECONDS", "180"))
+
+# Peso de cada categoria (maior = validada antes)
+CATEGORY_PRIORITY = {
+    'fauna_marinha': 40,          # Animal encalhado/ferido: cada minuto conta
+    'poluicao_aguas': 35,         # Manchas de óleo se espalham rápido
+    'erosao_costeira': 20,
+    'desmatamento': 20,
+    'flora_marinha': 15,
+    'exploracao_recursos': 15,
+    'construcoes_irregulares': 10,
+    'turismo_predatorio': 10,
+    'poluicao_solo': 10,
+    'outros': 5,
+    'poluicao_sonora': 0
+}
+
+COASTAL_BONUS = 20
+
+def compute_priority(denuncia: Denuncia) -> int:
+    """
+    🚨 Prioridade de validação da denúncia
+
+    Soma o peso da categoria e o bônus de área costeira. A idade entra
+    depois, no envelhecimento (ver schedule_offset).
+
+    Não há bônus pelo histórico do denunciante: POST /denuncias não
+    identifica o usuário (user_id fica sempre vazio), então o histórico
+    seria sempre neutro e só custaria uma consulta por denúncia.
+    """
+    priority = CATEGORY_PRIORITY.get(denuncia.category, 5)
+    if is_coastal_area(denuncia.latitude, denuncia.longitude):
+        priority += COASTAL_BONUS
+    return priority
+
+
+def schedule_offset(priority: int) -> float:
+    """
+    Antecipação (segundos) do "prazo virtual" do job
+
+    A fila ordena por prazo virtual = criação - prioridade × PRIORITY_AGING_SECONDS.
+    Isso equivale a ordenar por prioridade + idade / PRIORITY_AGING_SECONDS,
+    mas com uma coluna fixa e indexável: jobs antigos sempre acabam passando
+    à frente, então nenhum fica esperando para sempre.
+    """
+    return priority * PRIORITY_AGING_SECONDS
@@ -0,0 +1,245 @@
+# services/validation_queue.py
+import os
+from datetime import timedelta
+from typing import Dict, List
+
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
+
+from database.models import Denuncia, ValidationJob
+from services.validation_priority import schedule_offset
+from services.response_cache import notify_denuncias_changed
+
+# Máximo de jobs pendentes antes de recusar novas denúncias
+MAX_QUEUE_DEPTH = int(os.getenv("VALIDATION_QUEUE_MAX_DEPTH", "5000"))
+
+# Tempo que um job fica reservado para um worker antes de voltar para a fila
+VISIBILITY_TIMEOUT = int(os.getenv("VALIDATION_VISIBILITY_TIMEOUT", "300"))
+
+# Tentativas e backoff exponencial entre elas (em segundos)
+MAX_ATTEMPTS = int(os.getenv("VALIDATION_MAX_ATTEMPTS", "5"))
+RETRY_BASE_DELAY = int(os.getenv("VALIDATION_RETRY_BASE_DELAY", "10"))
+RETRY_MAX_DELAY = int(os.getenv("VALIDATION_RETRY_MAX_DELAY", "900"))
+
+# Máximo de jobs lidos por consulta de métricas de tempo (GET /metrics/validation-timings)
+MAX_TIMING_SAMPLES = int(os.getenv("VALIDATION_TIMING_MAX_SAMPLES", "2000"))
+
+
+class QueueFullError(Exception):
+    """Fila de validação acima do limite configurado"""
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        super().__init__(f"Fila de validação cheia ({depth} jobs pendentes)")
+
+
+def queue_depth(db: Session) -> int:
+    """Quantidade de jobs ainda não concluídos"""
+    return db.query(func.count(ValidationJob.id)).filter(
+        ValidationJob.status.in_(["queued", "running"])
+    ).scalar()
+
+
+def check_backpressure(db: Session):
+    """Levanta QueueFullError se a fila passou do limite"""
+    depth = queue_depth(db)
+    if depth >= MAX_QUEUE_DEPTH:
+        raise QueueFullError(depth)
+
+
+def enqueue_validation(db: Session, denuncia_id: int, priority: int = 0) -> ValidationJob:
+    """
+    📥 Adiciona um job de validação na sessão (sem commit)
+
+    O commit fica com quem chama, para gravar denúncia e job na mesma transação.
+    Maior `priority` = validado antes (ver services/validation_priority.py).
+    """
+    job = ValidationJob(
+        denuncia_id=denuncia_id,
+        status="queued",
+        attempts=0,
+        max_attempts=MAX_ATTEMPTS,
+        priority=priority,
+        virtual_deadline=func.now() - timedelta(seconds=schedule_offset(priority))
+    )
+    db.add(job)
+    return job
+
+
+def claim_jobs(db: Session, worker_id: str, limit: int) -> List[Dict]:
+    """
+    🔒 Reserva até `limit` jobs para este worker
+
+    Usa SELECT ... FOR UPDATE SKIP LOCKED: workers concorrentes nunca
+    pegam o mesmo job e não esperam uns pelos outros. Jobs com
+    visibilidade expirada (worker morreu) voltam a ser elegíveis.
+    A ordem é pelo prazo virtual: prioridade com envelhecimento.
+    """
+    now = func.now()
+    jobs = db.query(ValidationJob).filter(
+        or_(
+            and_(ValidationJob.status == "queued", ValidationJob.available_at <= now),
+            and_(
+                ValidationJob.status == "running",
+                ValidationJob.locked_until < now,
+                ValidationJob.attempts < ValidationJob.max_attempts
+            )
+        )
+    ).order_by(
+        ValidationJob.virtual_deadline, ValidationJob.id
+    ).with_for_update(skip_locked=True).limit(limit).all()
+
+    claimed = []
+    for job in jobs:
+        job.status = "running"
+        job.attempts = job.attempts + 1
+        job.locked_by = worker_id
+        job.locked_until = now + timedelta(seconds=VISIBILITY_TIMEOUT)
+        claimed.append({
+            "id": job.id,
+            "denuncia_id": job.denuncia_id,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "priority": job.priority
+        })
+
+    db.commit()
+    return claimed
+
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """✅ Marca o job como concluído (sem commit). Retorna False se o job não é mais deste worker"""
+    updated = db.query(ValidationJob).filter(
+        ValidationJob.id == job_id,
+        ValidationJob.locked_by == worker_id,
+        ValidationJob.status == "running"
+    ).update({
+        ValidationJob.status: "done",
+        ValidationJob.locked_until: None,
+        ValidationJob.finished_at: func.now()
+    }, synchronize_session=False)
+    return updated > 0
+
+
+def record_job_timings(db: Session, job_id: int, timings_ms: Dict):
+    """⏱️ Guarda no job o tempo de cada etapa da validação (sem commit)"""
+    db.query(ValidationJob).filter(ValidationJob.id == job_id).update(
+        {ValidationJob.timings_ms: timings_ms}, synchronize_session=False
+    )
+
+
+def timing_samples(db: Session, limit: int = 1000) -> List[Dict]:
+    """Tempos por etapa dos últimos jobs concluídos"""
+    rows = db.query(ValidationJob.timings_ms).filter(
+        ValidationJob.status == "done",
+        ValidationJob.timings_ms.isnot(None)
+    ).order_by(ValidationJob.finished_at.desc()).limit(limit).all()
+    return [row.timings_ms for row in rows]
+
+
+def retry_delay(attempts: int) -> int:
+    """Backoff exponencial: base, 2x base, 4x base... até o máximo"""
+    return min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** max(0, attempts - 1)))
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str):
+    """
+    ❌ Registra a falha do job e faz commit
+
+    Se ainda há tentativas, o job volta para a fila com backoff;
+    senão fica como failed e a denúncia vai para revisão manual.
+    """
+    job = db.query(ValidationJob).filter(
+        ValidationJob.id == job_id,
+        ValidationJob.locked_by == worker_id
+    ).with_for_update().first()
+
+    if not job:
+        db.rollback()
+        return
+
+    job.last_error = error[:2000]
+    job.locked_by = None
+    job.locked_until = None
+
+    if job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.available_at = func.now() + timedelta(seconds=retry_delay(job.attempts))
+    else:
+        job.status = "failed"
+        job.finished_at = func.now()
+        _marcar_revisao_manual(db, job.denuncia_id)
+
+    db.commit()
+
+
+def defer_job(db: Session, job_id: int, worker_id: str, delay_seconds: float, reason: str):
+    """
+    ⏸️ Devolve o job para a fila sem gastar uma tentativa e faz commit
+
+    Para quando o upstream recusou a chamada sem processá-la (circuito
+    aberto, limite de concorrência): a tentativa contada no claim é
+    desfeita, para que uma queda do Vision não esgote as tentativas e
+    mande a fila inteira para revisão manual. O prazo virtual não muda,
+    então o job mantém o lugar na ordem de prioridade.
+    """
+    job = db.query(ValidationJob).filter(
+        ValidationJob.id == job_id,
+        ValidationJob.locked_by == worker_id
+    ).with_for_update().first()
+
+    if not job:
+        db.rollback()
+        return
+
+    job.status = "queued"
+    job.attempts = max(0, job.attempts - 1)
+    job.last_error = reason[:2000]
+    job.locked_by = None
+    job.locked_until = None
+    job.available_at = func.now() + timedelta(seconds=delay_seconds)
+
+    db.commit()
+
+
+def reap_expired_jobs(db: Session) -> int:
+    """🧹 Jobs que estouraram a visibilidade sem tentativas restantes viram failed"""
+    jobs = db.query(ValidationJob).filter(
+        ValidationJob.status == "running",
+        ValidationJob.locked_until < func.now(),
+        ValidationJob.attempts >= ValidationJob.max_attempts
+    ).with_for_update(skip_locked=True).all()
+
+    for job in jobs:
+        job.status = "failed"
+        job.last_error = "Tempo de visibilidade esgotado"
+        job.locked_by = None
+        job.locked_until = None
+        job.finished_at = func.now()
+        _marcar_revisao_manual(db, job.denuncia_id)
+
+    db.commit()
+    return len(jobs)
+
+
+def queue_stats(db: Session) -> Dict:
+    """📊 Quantidade de jobs por status"""
+    rows = db.query(ValidationJob.status, func.count(ValidationJob.id)).group_by(ValidationJob.status).all()
+    stats = {status: count for status, count in rows}
+    stats["depth"] = stats.get("queued", 0) + stats.get("running", 0)
+    stats["max_depth"] = MAX_QUEUE_DEPTH
+
+    # Pendentes por prioridade (maior primeiro)
+    by_priority = db.query(ValidationJob.priority, func.count(ValidationJob.id)).filter(
+        ValidationJob.status == "queued"
+    ).group_by(ValidationJob.priority).order_by(ValidationJob.priority.desc()).all()
+    stats["queued_by_priority"] = {str(priority): count for priority, count in by_priority}
+    return stats
+
+
+def _marcar_revisao_manual(db: Session, denuncia_id: int):
+    denuncia = db.query(Denuncia).filter(Denuncia.id == denuncia_id).first()
+    if denuncia:
+        denuncia.status = "needs_manual_review"
+        denuncia.is_ai_validated = False
+        notify_denuncias_changed(db, [denuncia_id])
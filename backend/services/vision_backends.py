@@ -0,0 +1,293 @@
+# services/vision_backends.py
+import io
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+# "async": cliente gRPC assíncrono | "thread": cliente síncrono num pool de threads
+VISION_CLIENT_MODE = os.getenv("VISION_CLIENT_MODE", "async")
+
+# Máximo de chamadas simultâneas no modo "thread"
+VISION_MAX_THREADS = int(os.getenv("VISION_MAX_THREADS", "8"))
+
+# Backend local (ONNX): modelo de classificação e arquivo de labels (uma por linha)
+LOCAL_VISION_MODEL = os.getenv("LOCAL_VISION_MODEL", "models/image_classifier.onnx")
+LOCAL_VISION_LABELS = os.getenv("LOCAL_VISION_LABELS", "models/image_classifier_labels.txt")
+LOCAL_VISION_TOP_K = int(os.getenv("LOCAL_VISION_TOP_K", "10"))
+LOCAL_VISION_MIN_SCORE = float(os.getenv("LOCAL_VISION_MIN_SCORE", "0.02"))
+LOCAL_VISION_THREADS = int(os.getenv("LOCAL_VISION_THREADS", "2"))
+
+# Uma imagem para analisar: (bytes, features pedidas)
+AnnotateItem = Tuple[bytes, List[str]]
+
+
+class VisionBackend:
+    """
+    🧩 Interface dos backends de análise de imagem
+
+    `annotate_batch` recebe várias imagens e devolve, na mesma ordem, um
+    dicionário no formato usado pelo validador:
+        {"labels": [...], "text": str, "safe_search": dict | None, "landmarks": [...]}
+    ou uma Exception para a imagem que falhou.
+    """
+
+    name = "base"
+
+    # Nome do upstream na camada de resiliência (services/resilience.py)
+    upstream = "vision"
+
+    # Quantas imagens cabem numa chamada (usado pelo micro-batcher)
+    max_batch_size = 1
+
+    async def annotate_batch(self, items: List[AnnotateItem]) -> List:
+        raise NotImplementedError
+
+    async def annotate(self, content: bytes, features: List[str]) -> Dict:
+        result = (await self.annotate_batch([(content, features)]))[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class GoogleVisionBackend(VisionBackend):
+    """
+    🔌 Google Cloud Vision
+
+    Mantém um só canal gRPC por processo, para que várias validações
+    possam rodar em paralelo no mesmo event loop sem bloqueá-lo.
+    """
+
+    name = "google"
+    max_batch_size = 16
+
+    def __init__(self, mode: str = VISION_CLIENT_MODE, max_threads: int = VISION_MAX_THREADS):
+        if mode not in ("async", "thread"):
+            raise ValueError(f"VISION_CLIENT_MODE inválido: {mode}")
+
+        from google.cloud import vision
+        self._vision = vision
+
+        self.mode = mode
+        self.max_threads = max_threads
+
+        self.feature_types = {
+            # Detectar objetos/labels
+            "labels": {"type_": vision.Feature.Type.LABEL_DETECTION, "max_results": 20},
+            # Detectar texto (útil para placas, documentos)
+            "text": {"type_": vision.Feature.Type.TEXT_DETECTION},
+            # Safe search (detectar conteúdo inadequado)
+            "safe_search": {"type_": vision.Feature.Type.SAFE_SEARCH_DETECTION},
+            # Detectar landmarks (praias, locais conhecidos)
+            "landmarks": {"type_": vision.Feature.Type.LANDMARK_DETECTION}
+        }
+
+        self._async_client = None
+        self._async_loop = None
+        self._sync_client = None
+        self._executor = None
+
+    def _get_async_client(self):
+        # O canal gRPC assíncrono fica preso ao event loop em que foi criado
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = self._vision.ImageAnnotatorAsyncClient()
+            self._async_loop = loop
+        return self._async_client
+
+    def _get_sync_client(self):
+        if self._sync_client is None:
+            self._sync_client = self._vision.ImageAnnotatorClient()
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_threads,
+                thread_name_prefix="vision"
+            )
+        return self._sync_client
+
+    async def _batch_annotate(self, requests: List) -> List:
+        if self.mode == "async":
+            response = await self._get_async_client().batch_annotate_images(requests=requests)
+        else:
+            client = self._get_sync_client()
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._executor,
+                partial(client.batch_annotate_images, requests=requests)
+            )
+
+        return list(response.responses)
+
+    async def annotate_batch(self, items: List[AnnotateItem]) -> List:
+        # Todas as features de uma imagem numa só requisição: a imagem é enviada uma única vez
+        requests = [
+            {
+                "image": self._vision.Image(content=content),
+                "features": [self.feature_types[feature] for feature in features]
+            }
+            for content, features in items
+        ]
+
+        responses = await self._batch_annotate(requests)
+        if len(responses) != len(items):
+            raise RuntimeError(f"Vision retornou {len(responses)} respostas para {len(items)} imagens")
+
+        results = []
+        for (_, features), response in zip(items, responses):
+            if response.error.message:
+                results.append(RuntimeError(f"Google Vision error: {response.error.message}"))
+            else:
+                results.append(self.parse_response(response, features))
+        return results
+
+    @staticmethod
+    def parse_response(response, features: List[str]) -> Dict:
+        """Converte a resposta do Vision em dicionário serializável (JSON)"""
+        safe_search = None
+        if "safe_search" in features:
+            annotation = response.safe_search_annotation
+            safe_search = {
+                field: getattr(annotation, field).name
+                for field in ("adult", "spoof", "medical", "violence", "racy")
+            }
+
+        return {
+            "labels": [label.description.lower() for label in response.label_annotations] if "labels" in features else [],
+            "text": response.full_text_annotation.text if "text" in features and response.full_text_annotation else "",
+            "safe_search": safe_search,
+            "landmarks": [landmark.description.lower() for landmark in response.landmark_annotations] if "landmarks" in features else []
+        }
+
+
+class LocalOnnxBackend(VisionBackend):
+    """
+    🖥️ Classificador local em CPU (ONNX Runtime)
+
+    Roda sem rede e sem credenciais. Espera um classificador de imagens
+    (ex.: MobileNet/EfficientNet treinado no ImageNet) com entrada NCHW
+    float32 224x224 e um arquivo de labels em inglês, uma por linha.
+    Sinônimos separados por vírgula viram labels distintas
+    ("seashore, coast, seacoast" -> "seashore", "coast", "seacoast"),
+    compatíveis com as tabelas de palavras-chave do validador.
+
+    Só produz labels: texto, safe search e landmarks ficam vazios.
+    """
+
+    name = "local_onnx"
+    upstream = "local_vision"
+    max_batch_size = 16
+
+    # Normalização padrão do ImageNet
+    INPUT_SIZE = 224
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
+
+    def __init__(self, model_path: str = LOCAL_VISION_MODEL, labels_path: str = LOCAL_VISION_LABELS,
+                 top_k: int = LOCAL_VISION_TOP_K, min_score: float = LOCAL_VISION_MIN_SCORE,
+                 threads: int = LOCAL_VISION_THREADS):
+        try:
+            import numpy as np
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError("Backend local requer 'onnxruntime' e 'numpy' instalados") from e
+
+        self._np = np
+        self.top_k = top_k
+        self.min_score = min_score
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        with open(labels_path, "r", encoding="utf-8") as f:
+            self.class_labels = [
+                [synonym.strip().lower() for synonym in line.split(",") if synonym.strip()]
+                for line in f if line.strip()
+            ]
+
+        # Uma inferência por vez por processo; o ONNX já usa várias threads internamente
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="onnx")
+
+    def _preprocess(self, content: bytes):
+        from PIL import Image, ImageOps
+
+        np = self._np
+        with Image.open(io.BytesIO(content)) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img = ImageOps.fit(img, (self.INPUT_SIZE, self.INPUT_SIZE), Image.BILINEAR)
+            array = np.asarray(img, dtype=np.float32) / 255.0
+
+        array = (array - np.array(self.MEAN, dtype=np.float32)) / np.array(self.STD, dtype=np.float32)
+        return array.transpose(2, 0, 1)
+
+    def _classify(self, contents: List[bytes]) -> List:
+        np = self._np
+
+        # Imagem corrompida ou em formato não suportado falha sozinha, não o lote
+        arrays, results = [], []
+        for content in contents:
+            try:
+                arrays.append(self._preprocess(content))
+                results.append(None)
+            except Exception as e:
+                results.append(ValueError(f"Imagem inválida: {e}"))
+        if not arrays:
+            return results
+
+        logits = self.session.run(None, {self.input_name: np.stack(arrays)})[0]
+
+        # Softmax estável
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+
+        all_labels = []
+        for row in probs:
+            labels = []
+            for index in np.argsort(row)[::-1][:self.top_k]:
+                if row[index] < self.min_score:
+                    break
+                for synonym in self.class_labels[index]:
+                    if synonym not in labels:
+                        labels.append(synonym)
+            all_labels.append(labels)
+
+        labels_iter = iter(all_labels)
+        return [result if result is not None else next(labels_iter) for result in results]
+
+    async def annotate_batch(self, items: List[AnnotateItem]) -> List:
+        loop = asyncio.get_running_loop()
+        labels = await loop.run_in_executor(self._executor, self._classify, [content for content, _ in items])
+
+        return [
+            image_labels if isinstance(image_labels, Exception) else {
+                "labels": image_labels if "labels" in features else [],
+                "text": "",
+                "safe_search": None,
+                "landmarks": []
+            }
+            for (_, features), image_labels in zip(items, labels)
+        ]
+
+
+def create_backend(name: str) -> Optional[VisionBackend]:
+    """Cria o backend pelo nome ("google", "local" ou "none")"""
+    name = (name or "none").lower()
+    if name == "none":
+        return None
+    if name == "google":
+        return GoogleVisionBackend()
+    if name in ("local", "local_onnx", "onnx"):
+        return LocalOnnxBackend()
+    raise ValueError(f"Backend de visão desconhecido: {name}")
+
+
+def create_backend_safe(name: str) -> Optional[VisionBackend]:
+    """Como create_backend, mas registra o erro e retorna None se não for possível criar"""
+    try:
+        return create_backend(name)
+    except Exception as e:
+        logging.error(f"Não foi possível iniciar o backend de visão '{name}': {e}")
+        return None
@@ -0,0 +1,115 @@
+# services/vision_batcher.py
+import os
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+# Limites de um lote (o Vision aceita até 16 imagens por chamada)
+VISION_BATCH_MAX_SIZE = min(16, int(os.getenv("VISION_BATCH_MAX_SIZE", "16")))
+VISION_BATCH_MAX_WAIT_MS = int(os.getenv("VISION_BATCH_MAX_WAIT_MS", "50"))
+VISION_BATCH_MAX_BYTES = int(os.getenv("VISION_BATCH_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+class VisionMicroBatcher:
+    """
+    📦 Agrupa requisições de várias denúncias numa só chamada ao backend de visão
+
+    Cada chamador recebe um future; o lote é enviado quando atinge
+    `max_batch_size` imagens, `max_batch_bytes` bytes ou após `max_wait_ms`.
+    As respostas voltam na mesma ordem das requisições.
+    """
+
+    def __init__(self, backend,
+                 max_batch_size: int = VISION_BATCH_MAX_SIZE,
+                 max_wait_ms: int = VISION_BATCH_MAX_WAIT_MS,
+                 max_batch_bytes: int = VISION_BATCH_MAX_BYTES):
+        self.backend = backend
+        self.max_batch_size = min(max_batch_size, backend.max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_bytes = max_batch_bytes
+
+        self._pending: List[Tuple[Tuple[bytes, List[str]], int, asyncio.Future]] = []
+        self._pending_bytes = 0
+        self._timer = None
+        # Envios em andamento: o event loop só guarda referência fraca às tasks
+        self._sending = set()
+
+        # Estatísticas
+        self.batches_sent = 0
+        self.images_sent = 0
+
+    async def annotate(self, content: bytes, features: List[str]) -> Dict:
+        """Enfileira uma imagem e aguarda o resultado correspondente"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        size = len(content)
+
+        # Lote atual não comporta esta imagem: enviar antes
+        if self._pending and self._pending_bytes + size > self.max_batch_bytes:
+            self._flush()
+
+        self._pending.append(((content, features), size, future))
+        self._pending_bytes += size
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = []
+        self._pending_bytes = 0
+
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[Tuple[bytes, List[str]], int, asyncio.Future]]):
+        # Requisições cujo chamador desistiu (cancelado) não são enviadas
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        self.batches_sent += 1
+        self.images_sent += len(batch)
+
+        try:
+            results = await self.backend.annotate_batch([item for item, _, _ in batch])
+        except Exception as e:
+            logging.error(f"Erro no lote do backend '{self.backend.name}' ({len(batch)} imagens): {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        if len(results) != len(batch):
+            error = RuntimeError(f"Backend retornou {len(results)} resultados para {len(batch)} imagens")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "batches_sent": self.batches_sent,
+            "images_sent": self.images_sent,
+            "avg_batch_size": round(self.images_sent / self.batches_sent, 2) if self.batches_sent else 0
+        }
@@ -0,0 +1,198 @@
+# services/vision_cache.py
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from database.connection import SessionLocal
+from database.models import VisionResult
+
+# Entradas mantidas em memória por processo
+VISION_CACHE_MEMORY_SIZE = int(os.getenv("VISION_CACHE_MEMORY_SIZE", "2048"))
+
+# Validade de um resultado (padrão: 30 dias)
+VISION_CACHE_TTL = int(os.getenv("VISION_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Máximo de linhas na tabela vision_results (as menos usadas saem primeiro)
+VISION_CACHE_MAX_ROWS = int(os.getenv("VISION_CACHE_MAX_ROWS", "500000"))
+
+
+class VisionResultCache:
+    """
+    🗃️ Cache em dois níveis dos resultados do Google Vision
+
+    1. LRU em memória (por processo)
+    2. Tabela vision_results no PostgreSQL (compartilhada entre workers)
+
+    A chave é o SHA-256 da imagem enviada + o conjunto de features pedido
+    + o backend que produziu o resultado.
+    """
+
+    def __init__(self, memory_size: int = VISION_CACHE_MEMORY_SIZE,
+                 ttl_seconds: int = VISION_CACHE_TTL,
+                 max_rows: int = VISION_CACHE_MAX_ROWS):
+        self.memory_size = memory_size
+        self.ttl_seconds = ttl_seconds
+        self.max_rows = max_rows
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Contadores
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(image_hash: str, features, backend: str = "google") -> str:
+        return f"{image_hash}:{','.join(sorted(features))}:{backend}"
+
+    # --- Memória ---
+
+    def _memory_get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+
+            results, expires_at = entry
+            if expires_at < time.time():
+                del self._memory[key]
+                return None
+
+            self._memory.move_to_end(key)
+            return results
+
+    def _memory_set(self, key: str, results: Dict, expires_at: float):
+        with self._lock:
+            self._memory[key] = (results, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    # --- PostgreSQL ---
+
+    def _db_get(self, key: str) -> Optional[tuple]:
+        db = SessionLocal()
+        try:
+            row = db.query(VisionResult).filter(
+                VisionResult.cache_key == key,
+                VisionResult.expires_at > func.now()
+            ).first()
+            if row is None:
+                return None
+
+            results = row.results
+            expires_at = row.expires_at.timestamp()
+
+            row.hit_count = VisionResult.hit_count + 1
+            row.last_hit_at = func.now()
+            db.commit()
+            return results, expires_at
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, image_hash: str, results: Dict):
+        db = SessionLocal()
+        try:
+            expires_at = func.now() + timedelta(seconds=self.ttl_seconds)
+            stmt = insert(VisionResult).values(
+                cache_key=key,
+                image_hash=image_hash,
+                results=results,
+                expires_at=expires_at,
+                hit_count=0
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[VisionResult.cache_key],
+                set_={"results": stmt.excluded.results, "expires_at": stmt.excluded.expires_at}
+            )
+            db.execute(stmt)
+            db.commit()
+        finally:
+            db.close()
+
+    # --- API pública ---
+
+    async def get(self, key: str) -> Optional[Dict]:
+        results = self._memory_get(key)
+        if results is not None:
+            self.memory_hits += 1
+            return results
+
+        try:
+            found = await asyncio.to_thread(self._db_get, key)
+        except Exception as e:
+            logging.error(f"Erro ao consultar cache do Vision: {e}")
+            found = None
+
+        if found is None:
+            self.misses += 1
+            return None
+
+        results, expires_at = found
+        self.db_hits += 1
+        self._memory_set(key, results, expires_at)
+        return results
+
+    async def set(self, key: str, image_hash: str, results: Dict):
+        self._memory_set(key, results, time.time() + self.ttl_seconds)
+        try:
+            await asyncio.to_thread(self._db_set, key, image_hash, results)
+        except Exception as e:
+            logging.error(f"Erro ao gravar cache do Vision: {e}")
+
+    def evict(self) -> int:
+        """🧹 Remove entradas expiradas e as menos usadas acima de max_rows"""
+        db = SessionLocal()
+        try:
+            removed = db.query(VisionResult).filter(
+                VisionResult.expires_at <= func.now()
+            ).delete(synchronize_session=False)
+
+            excess = select(VisionResult.cache_key).order_by(
+                VisionResult.last_hit_at.desc().nullslast(),
+                VisionResult.created_at.desc()
+            ).offset(self.max_rows)
+            removed += db.query(VisionResult).filter(
+                VisionResult.cache_key.in_(excess)
+            ).delete(synchronize_session=False)
+
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.db_hits) / lookups, 3) if lookups else 0,
+            "memory_entries": len(self._memory)
+        }
+
+
+def db_cache_stats(db) -> Dict:
+    """📊 Estatísticas da tabela vision_results (visão de todos os workers)"""
+    total, hits = db.query(
+        func.count(VisionResult.cache_key),
+        func.coalesce(func.sum(VisionResult.hit_count), 0)
+    ).one()
+    expired = db.query(func.count(VisionResult.cache_key)).filter(
+        VisionResult.expires_at <= func.now()
+    ).scalar()
+    return {
+        "entries": total,
+        "expired_entries": expired,
+        "total_db_hits": int(hits),
+        "max_rows": VISION_CACHE_MAX_ROWS
+    }
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+🤖 Worker de validação AI
+
+Consome a fila persistente `validation_jobs` e executa as validações
+fora do processo da API. Vários workers podem rodar em paralelo.
+
+Uso:
+    python worker.py --concurrency 8
+"""
+import os
+import socket
+import uuid
+import random
+import signal
+import asyncio
+import argparse
+import traceback
+from typing import Dict
+
+from database.connection import SessionLocal
+from services import validation_queue
+from services.ai_validation_service import SmartDenunciaValidator
+from services.image_processing import ImageProcessor
+from services.validation_pipeline import run_validation_job
+from services.phash_index import NearDuplicateIndex
+from services.resilience import upstreams_snapshot, UpstreamUnavailableError
+from services.map_clusters import fold_cluster_deltas
+
+# Intervalo entre varreduras de jobs com visibilidade expirada (segundos)
+REAP_INTERVAL = 30
+
+# Intervalo entre limpezas do cache do Vision (segundos)
+CACHE_EVICT_INTERVAL = int(os.getenv("VISION_CACHE_EVICT_INTERVAL", "3600"))
+
+# Espera extra (segundos, sorteada até este valor) ao devolver jobs recusados pelo
+# upstream, para os workers não voltarem todos juntos quando o circuito reabre
+DEFER_JITTER_SECONDS = float(os.getenv("VALIDATION_DEFER_JITTER_SECONDS", "5"))
+
+# Intervalo entre somas dos deltas do mapa em denuncia_clusters (segundos)
+CLUSTER_FOLD_INTERVAL = float(os.getenv("CLUSTER_FOLD_INTERVAL", "5"))
+
+# Intervalo entre cargas incrementais do índice de quase-duplicatas (segundos)
+PHASH_INDEX_REFRESH_INTERVAL = int(os.getenv("PHASH_INDEX_REFRESH_INTERVAL", "60"))
+
+
+class ValidationWorker:
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+        self.validator = SmartDenunciaValidator()
+        self.image_processor = ImageProcessor()
+        self.near_duplicates = NearDuplicateIndex()
+
+        self._inflight = set()
+        self._stopping = None
+
+    def _claim(self, limit: int):
+        db = SessionLocal()
+        try:
+            return validation_queue.claim_jobs(db, self.worker_id, limit)
+        finally:
+            db.close()
+
+    def _fail(self, job: Dict, error: str):
+        db = SessionLocal()
+        try:
+            validation_queue.fail_job(db, job["id"], self.worker_id, error)
+        finally:
+            db.close()
+
+    def _defer(self, job: Dict, delay_seconds: float, reason: str):
+        db = SessionLocal()
+        try:
+            validation_queue.defer_job(db, job["id"], self.worker_id, delay_seconds, reason)
+        finally:
+            db.close()
+
+    def _refresh_near_duplicates(self) -> int:
+        db = SessionLocal()
+        try:
+            return self.near_duplicates.refresh(db)
+        finally:
+            db.close()
+
+    def _fold_clusters(self) -> int:
+        db = SessionLocal()
+        try:
+            return fold_cluster_deltas(db)
+        finally:
+            db.close()
+
+    def _reap(self) -> int:
+        db = SessionLocal()
+        try:
+            return validation_queue.reap_expired_jobs(db)
+        finally:
+            db.close()
+
+    async def _process(self, job: Dict):
+        try:
+            await run_validation_job(
+                job, self.validator, self.image_processor, self.worker_id, self.near_duplicates
+            )
+        except UpstreamUnavailableError as e:
+            if e.retry_after is None:
+                # Prazo esgotado: o upstream chegou a ser chamado, conta como tentativa
+                await self._handle_failure(job, e)
+                return
+            # Recusada antes de chegar ao upstream: volta para a fila sem gastar tentativa
+            delay = e.retry_after + random.uniform(0, DEFER_JITTER_SECONDS)
+            print(f"⏸️ Job {job['id']} devolvido à fila por {delay:.0f}s: {e}")
+            try:
+                await asyncio.to_thread(self._defer, job, delay, str(e))
+            except Exception as defer_error:
+                print(f"❌ Não foi possível devolver o job {job['id']} à fila: {defer_error}")
+        except Exception as e:
+            await self._handle_failure(job, e)
+
+    async def _handle_failure(self, job: Dict, e: Exception):
+        print(f"❌ Erro no job {job['id']} (tentativa {job['attempts']}/{job['max_attempts']}): {e}")
+        traceback.print_exc()
+        try:
+            await asyncio.to_thread(self._fail, job, str(e))
+        except Exception as fail_error:
+            # O job volta para a fila quando a visibilidade expirar
+            print(f"❌ Não foi possível registrar a falha do job {job['id']}: {fail_error}")
+
+    def stop(self):
+        print("🛑 Encerrando worker: aguardando jobs em andamento...")
+        self._stopping.set()
+
+    async def run(self):
+        self._stopping = asyncio.Event()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except NotImplementedError:
+                pass  # Windows
+
+        print(f"🤖 Worker {self.worker_id} iniciado (concorrência: {self.concurrency})")
+
+        last_reap = 0.0
+        last_evict = loop.time()
+        last_phash_refresh = 0.0
+        last_fold = 0.0
+        while not self._stopping.is_set():
+            if loop.time() - last_phash_refresh > PHASH_INDEX_REFRESH_INTERVAL:
+                last_phash_refresh = loop.time()
+                try:
+                    added = await asyncio.to_thread(self._refresh_near_duplicates)
+                    if added:
+                        print(f"🔁 Índice de quase-duplicatas: +{added} | {self.near_duplicates.stats()}")
+                except Exception as e:
+                    print(f"❌ Erro ao carregar índice de quase-duplicatas: {e}")
+
+            if loop.time() - last_evict > CACHE_EVICT_INTERVAL:
+                last_evict = loop.time()
+                try:
+                    evicted = await asyncio.to_thread(self.validator.vision_cache.evict)
+                    print(f"🧹 Cache do Vision: {evicted} entradas removidas | {self.validator.vision_cache.stats()}")
+                except Exception as e:
+                    print(f"❌ Erro ao limpar cache do Vision: {e}")
+
+            if loop.time() - last_fold > CLUSTER_FOLD_INTERVAL:
+                last_fold = loop.time()
+                try:
+                    await asyncio.to_thread(self._fold_clusters)
+                except Exception as e:
+                    print(f"❌ Erro ao somar deltas do mapa: {e}")
+
+            if loop.time() - last_reap > REAP_INTERVAL:
+                last_reap = loop.time()
+                try:
+                    reaped = await asyncio.to_thread(self._reap)
+                    if reaped:
+                        print(f"🧹 {reaped} jobs expirados marcados como falha")
+                except Exception as e:
+                    print(f"❌ Erro ao varrer jobs expirados: {e}")
+
+            # Backpressure local: só reserva jobs para slots livres
+            free_slots = self.concurrency - len(self._inflight)
+            jobs = []
+            if free_slots > 0:
+                try:
+                    jobs = await asyncio.to_thread(self._claim, free_slots)
+                except Exception as e:
+                    print(f"❌ Erro ao buscar jobs: {e}")
+
+            for job in jobs:
+                task = asyncio.create_task(self._process(job))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            # Fila vazia ou todos os slots ocupados: esperar antes de tentar de novo
+            if not jobs or len(jobs) < free_slots:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+        self.image_processor.shutdown()
+        print(f"📊 Cache do Vision: {self.validator.vision_cache.stats()}")
+        print(f"🛡️ Upstreams: {upstreams_snapshot()}")
+        print(f"👋 Worker {self.worker_id} encerrado")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de validação AI do Guarda Azul")
+    parser.add_argument(
+        "--concurrency", type=int,
+        default=int(os.getenv("VALIDATION_WORKER_CONCURRENCY", "4")),
+        help="Validações simultâneas neste processo"
+    )
+    parser.add_argument(
+        "--poll-interval", type=float,
+        default=float(os.getenv("VALIDATION_POLL_INTERVAL", "1.0")),
+        help="Espera (segundos) quando a fila está vazia"
+    )
+    args = parser.parse_args()
+
+    worker = ValidationWorker(args.concurrency, args.poll_interval)
+    asyncio.run(worker.run())
+
+
+if __name__ == "__main__":
+    main()